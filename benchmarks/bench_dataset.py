@@ -0,0 +1,75 @@
+"""Load time and memory: CSV parsing vs. the binary dataset cache.
+
+For each scale the bundled CSV is replicated ``scale`` times into a
+temporary file.  Every measurement runs in a fresh interpreter and reports
+wall time and the growth in peak RSS caused by the load (for the
+memory-mapped cache the columns are also summed, so their pages are touched).
+
+Usage: python benchmarks/bench_dataset.py [--scales 1 100 1000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+import numpy as np, pandas as pd
+import crop_prediction, dataset_cache
+path, mode = {path!r}, {mode!r}
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if mode == 'csv':
+    frame = crop_prediction.load_dataset(path, use_cache=False)
+    total = float(frame[dataset_cache.NUMERIC].to_numpy().sum())
+elif mode == 'prepare':
+    dataset_cache.prepare(path, {cache_dir!r})
+else:
+    data = dataset_cache.load(path, {cache_dir!r})
+    total = float(np.asarray(data['features'], dtype=np.float64).sum())
+seconds = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': seconds, 'peak_rss_mb': (after - before) / 1024}}))
+"""
+
+
+def measure(path, mode, cache_dir):
+    code = MEASURE.format(root=ROOT, path=path, mode=mode, cache_dir=cache_dir)
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 100, 1000])
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(ROOT, 'Crop_recommendation.csv'), encoding='utf-8') as f:
+        header, *rows = f.read().splitlines()
+    print(f"{'scale':>6} {'rows':>11} {'CSV s':>8} {'CSV MB':>8} {'prepare s':>10} {'cache s':>8} {'cache MB':>9}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f'crops_x{scale}.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(header + '\n')
+                for _ in range(scale):
+                    f.write('\n'.join(rows) + '\n')
+            cache_dir = os.path.join(tmp, 'cache')
+            csv = measure(path, 'csv', cache_dir)
+            prepared = measure(path, 'prepare', cache_dir)
+            cached = measure(path, 'load', cache_dir)
+            row = {'scale': scale, 'rows': len(rows) * scale, 'csv': csv, 'prepare': prepared, 'cache': cached}
+            results.append(row)
+            print(f"{scale:>6} {row['rows']:>11,} {csv['seconds']:>8.3f} {csv['peak_rss_mb']:>8.1f} "
+                  f"{prepared['seconds']:>10.3f} {cached['seconds']:>8.3f} {cached['peak_rss_mb']:>9.1f}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Start-up cost of ``import crop_prediction`` measured with ``-X importtime``.
+
+Runs each measurement in a fresh interpreter.  ``--ref REV`` also measures
+the tree at a git revision (extracted to a temporary directory) so the cost
+before and after a change can be compared.
+
+Usage: python benchmarks/bench_import.py [--runs N] [--ref REV]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('pandas', 'sklearn', 'joblib', 'scipy', 'matplotlib', 'seaborn')
+SNIPPET = ("import sys, crop_prediction; "
+           "print('LOADED', ','.join(m for m in {heavy!r} if m in sys.modules))")
+
+
+def measure(tree, runs):
+    """Return (median total µs, top modules by cumulative µs, heavy modules loaded)."""
+    totals, top, loaded = [], [], ''
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', SNIPPET.format(heavy=HEAVY)],
+                              cwd=tree, capture_output=True, text=True)
+        rows = []
+        for line in proc.stderr.splitlines():
+            match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)', line)
+            if match:
+                rows.append((int(match.group(2)), len(match.group(3)), match.group(4)))
+        total = next((cum for cum, _, name in rows if name == 'crop_prediction'), None)
+        if total is None:
+            raise RuntimeError(f"import failed in {tree}:\n{proc.stderr[-2000:]}")
+        totals.append(total)
+        top = sorted((r for r in rows if r[1] <= 3), reverse=True)[:8]
+        loaded = next((line.split(' ', 1)[1] for line in proc.stdout.splitlines()
+                       if line.startswith('LOADED ')), '')
+    return statistics.median(totals), top, loaded
+
+
+def report(label, tree, runs):
+    total, top, loaded = measure(tree, runs)
+    print(f"{label}: import crop_prediction = {total / 1000:.1f} ms (median of {runs})")
+    print(f"  heavy modules loaded: {loaded or 'none'}")
+    for cumulative, _, name in top:
+        print(f"  {cumulative / 1000:9.1f} ms  {name}")
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--ref', help="git revision to compare against")
+    args = parser.parse_args(argv)
+
+    results = {'working tree': report('working tree', ROOT, args.runs)}
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tree:
+            archive = subprocess.run(['git', 'archive', args.ref], cwd=ROOT, capture_output=True, check=True)
+            subprocess.run(['tar', '-x', '-C', tree], input=archive.stdout, check=True)
+            os.symlink(os.path.join(ROOT, 'artifacts'), os.path.join(tree, 'artifacts'))
+            results[args.ref] = report(args.ref, tree, args.runs)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Single-row latency (p50/p99) of the NumPy kernel vs. scikit-learn.
+
+Also checks that the kernel matches ``model.predict``/``predict_proba`` bit for
+bit on the held-out split.
+
+Usage: python benchmarks/bench_kernel.py [--calls N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crop_prediction  # noqa: E402
+import linear_kernel  # noqa: E402
+
+
+def latencies_us(fn, rows):
+    timings = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        fn(row)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    artifact = crop_prediction.get_artifact()
+    if 'weights' not in artifact:
+        sys.exit("The latest artifact has no kernel weights; retrain with 'crop_prediction.py train'.")
+    model = artifact['model']
+    dataset = crop_prediction.load_dataset()
+    X = dataset[artifact['features']].to_numpy(dtype=float)
+    _, x_test = train_test_split(X, test_size=0.3, random_state=42)
+
+    kernel = linear_kernel.LinearKernel.from_weights(artifact['weights'], artifact)
+    batch_ok = linear_kernel.verify(model, artifact['weights'], x_test)
+    rows_ok = all(kernel.predict_row(row) == model.predict(row.reshape(1, -1))[0] for row in x_test)
+    print(f"bit-for-bit on test split: batch={batch_ok} single-row={rows_ok}")
+
+    rows = X[np.random.default_rng(0).integers(0, len(X), args.calls)]
+    row_lists = rows.tolist()
+    results = {
+        'sklearn model.predict': latencies_us(lambda r: model.predict(r.reshape(1, -1)), rows),
+        'kernel predict_row': latencies_us(kernel.predict_row, row_lists),
+        'crop_prediction.predict_crop': latencies_us(lambda r: crop_prediction.predict_crop(*r), row_lists),
+    }
+    print(f"{'path':<30} {'p50 µs':>9} {'p99 µs':>9}")
+    for name, timings in results.items():
+        print(f"{name:<30} {np.percentile(timings, 50):>9.2f} {np.percentile(timings, 99):>9.2f}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
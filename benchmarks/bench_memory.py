@@ -0,0 +1,138 @@
+"""Peak memory of training and serving: default pandas dtypes vs. the compact schema.
+
+A synthetic dataset of ``--rows`` rows is drawn from the bundled CSV (rows
+resampled with a little Gaussian jitter) and stored as compact ``.npy``
+columns.  Each measurement then runs in a fresh interpreter and reports wall
+time and the growth in peak RSS:
+
+* ``legacy``: the frame ``pd.read_csv`` would produce (float64 measurements,
+  object ``season``/``label`` strings), mapped to codes, sliced into a
+  float64 ``X`` and split with ``train_test_split``, as the scripts used to.
+* ``compact``: memory-mapped float32/int8 columns split straight into
+  float32 train/test arrays by :func:`schema.train_test_arrays`.
+
+``train`` includes fitting a logistic regression (``--max-iter`` lbfgs
+iterations, so the solver's own buffers are counted too); ``serve`` predicts
+every row with the current artifact, all at once for ``legacy`` and in
+``--chunk``-row blocks for ``compact``.
+
+Usage: python benchmarks/bench_memory.py [--rows 1000000 10000000 30000000]
+
+The legacy pipeline needs about 350 MB per million rows, so only ask for
+tens of millions of rows on a machine with the memory for it.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dataset_cache  # noqa: E402
+import schema  # noqa: E402
+
+MEASURE = """
+import json, resource, sys, time, warnings
+sys.path.insert(0, {root!r})
+warnings.filterwarnings('ignore')
+import numpy as np, pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+import crop_prediction, schema
+directory, pipeline, phase, max_iter, chunk = {directory!r}, {pipeline!r}, {phase!r}, {max_iter}, {chunk}
+artifact = crop_prediction.get_artifact() if phase == 'serve' else None
+data = {{name: np.load(f'{{directory}}/{{name}}.npy', mmap_mode='r') for name in ('features', 'season', 'label')}}
+seasons = np.array(list(schema.season_mapping), dtype=object)
+labels = np.array(list(schema.label_mapping), dtype=object)
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if pipeline == 'legacy':
+    dataset = pd.DataFrame(np.asarray(data['features'], dtype=np.float64), columns=schema.NUMERIC_FEATURES)
+    dataset['season'] = seasons[np.asarray(data['season']) - 1]
+    dataset['label'] = labels[np.asarray(data['label']) - 1]
+    dataset = crop_prediction.encode_dataset(dataset)
+    X = dataset[schema.FEATURES].to_numpy(dtype=float)
+    y = dataset['label'].to_numpy()
+    if phase == 'train':
+        x_train, x_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+    else:
+        crops = artifact['model'].predict(X)
+else:
+    if phase == 'train':
+        x_train, x_test, y_train, y_test = schema.train_test_arrays(data)
+    else:
+        for i in range(0, len(data['label']), chunk):
+            rows = slice(i, i + chunk)
+            crops = crop_prediction.predict_crops(schema.feature_matrix(data['features'], data['season'], rows),
+                                                  artifact)
+if phase == 'train':
+    LogisticRegression(max_iter=max_iter).fit(x_train, y_train)
+seconds = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': seconds, 'peak_rss_mb': (after - before) / 1024}}))
+"""
+
+
+def synthesize(directory, n_rows, seed=0, chunk=1_000_000):
+    """Write ``n_rows`` jittered resamples of the bundled dataset as compact columns."""
+    source = dataset_cache.load()
+    rng = np.random.default_rng(seed)
+    spread = np.asarray(source['features']).std(axis=0) * 0.05
+    os.makedirs(directory, exist_ok=True)
+    out = {
+        'features': np.lib.format.open_memmap(os.path.join(directory, 'features.npy'), 'w+',
+                                              schema.MEASUREMENT_DTYPE, (n_rows, len(schema.NUMERIC_FEATURES))),
+        'season': np.lib.format.open_memmap(os.path.join(directory, 'season.npy'), 'w+', schema.CODE_DTYPE, (n_rows,)),
+        'label': np.lib.format.open_memmap(os.path.join(directory, 'label.npy'), 'w+', schema.CODE_DTYPE, (n_rows,)),
+    }
+    for start in range(0, n_rows, chunk):
+        stop = min(start + chunk, n_rows)
+        idx = rng.integers(0, len(source['label']), stop - start)
+        out['features'][start:stop] = source['features'][idx] + rng.normal(0, spread, (stop - start, len(spread)))
+        out['season'][start:stop] = source['season'][idx]
+        out['label'][start:stop] = source['label'][idx]
+    for array in out.values():
+        array.flush()
+
+
+def measure(directory, pipeline, phase, max_iter, chunk):
+    code = MEASURE.format(root=ROOT, directory=directory, pipeline=pipeline, phase=phase, max_iter=max_iter,
+                          chunk=chunk)
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--max-iter', type=int, default=5, help="lbfgs iterations per training fit")
+    parser.add_argument('--chunk', type=int, default=1_000_000, help="rows per compact serving block")
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>11} {'phase':>6} {'legacy s':>9} {'legacy MB':>10} {'compact s':>10} {'compact MB':>11} "
+          f"{'saved':>6}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            directory = os.path.join(tmp, f'rows{n_rows}')
+            synthesize(directory, n_rows)
+            for phase in ('train', 'serve'):
+                legacy = measure(directory, 'legacy', phase, args.max_iter, args.chunk)
+                compact = measure(directory, 'compact', phase, args.max_iter, args.chunk)
+                row = {'rows': n_rows, 'phase': phase, 'legacy': legacy, 'compact': compact}
+                results.append(row)
+                saved = 1 - compact['peak_rss_mb'] / legacy['peak_rss_mb']
+                print(f"{n_rows:>11,} {phase:>6} {legacy['seconds']:>9.2f} {legacy['peak_rss_mb']:>10.0f} "
+                      f"{compact['seconds']:>10.2f} {compact['peak_rss_mb']:>11.0f} {saved:>6.0%}")
+            shutil.rmtree(directory)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Incremental update vs. full retraining as the dataset grows.
+
+At each scale the dataset holds ``scale`` x the bundled rows (resampled with
+small Gaussian jitter).  A new batch of 10% more rows arrives; full
+retraining refits logistic regression on everything, the online model only
+learns the new batch.  Accuracy is measured on the bundled dataset.
+
+Usage: python benchmarks/bench_online.py [--scales 10 100 1000]
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crop_prediction  # noqa: E402
+import model_zoo  # noqa: E402
+
+
+def jittered(X, y, n_rows, rng):
+    idx = rng.integers(0, len(X), n_rows)
+    noise = rng.normal(0, 0.02, (n_rows, X.shape[1])) * X.std(axis=0)
+    noise[:, crop_prediction.FEATURES.index('season')] = 0
+    return X[idx] + noise, y[idx]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore')
+
+    dataset = crop_prediction.load_dataset()
+    X = dataset[crop_prediction.FEATURES].to_numpy(dtype=float)
+    y = dataset['label'].to_numpy()
+    rng = np.random.default_rng(0)
+
+    print(f"{'scale':>6} {'rows':>10} {'full fit s':>11} {'full acc':>9} {'update s':>9} {'online acc':>11}")
+    results = []
+    for scale in args.scales:
+        X_old, y_old = jittered(X, y, len(X) * scale, rng)
+        X_new, y_new = jittered(X, y, len(X_old) // 10, rng)
+
+        online = model_zoo.make_model('online_sgd').fit(X_old, y_old)
+        start = time.perf_counter()
+        updated = copy.deepcopy(online).partial_fit(X_new, y_new)
+        update_seconds = time.perf_counter() - start
+
+        full = model_zoo.make_model('logistic_regression')
+        start = time.perf_counter()
+        full.fit(np.concatenate([X_old, X_new]), np.concatenate([y_old, y_new]))
+        full_seconds = time.perf_counter() - start
+
+        row = {
+            'scale': scale,
+            'rows': len(X_old) + len(X_new),
+            'full_fit_seconds': full_seconds,
+            'full_accuracy': float((full.predict(X) == y).mean()),
+            'update_seconds': update_seconds,
+            'online_accuracy': float((updated.predict(X) == y).mean()),
+        }
+        results.append(row)
+        print(f"{scale:>6} {row['rows']:>10,} {full_seconds:>11.2f} {row['full_accuracy']:>9.2%} "
+              f"{update_seconds:>9.3f} {row['online_accuracy']:>11.2%}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
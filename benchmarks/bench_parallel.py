@@ -0,0 +1,48 @@
+"""Rows/sec of :class:`scoring.ParallelScorer` for increasing worker counts.
+
+Usage: python benchmarks/bench_parallel.py [--rows N] [--workers 1 2 4 ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crop_prediction  # noqa: E402
+import scoring  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--top-k', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    artifact = crop_prediction.get_artifact()
+    dataset = pd.read_csv(crop_prediction.DATA_PATH).drop(columns='label')
+    X = crop_prediction.to_feature_matrix(
+        dataset.sample(args.rows, replace=True, random_state=0), artifact)
+
+    # Same path as the workers; the untimed call loads the lazy model/kernel first
+    crop_prediction._predict_proba(artifact, X[:1000])
+    start = time.perf_counter()
+    crop_prediction.top_k_indices(crop_prediction._predict_proba(artifact, X), args.top_k)
+    results = {'in-process': args.rows / (time.perf_counter() - start)}
+    for workers in args.workers:
+        with scoring.ParallelScorer(artifact, workers) as scorer:
+            scorer.score(X[:1000], args.top_k)  # start the workers
+            start = time.perf_counter()
+            scorer.score(X, args.top_k)
+            results[f'{workers} workers'] = args.rows / (time.perf_counter() - start)
+    for name, rate in results.items():
+        print(f"{name:<14} {rate:>14,.0f} rows/sec")
+    return results
+
+
+if __name__ == '__main__':
+    main()
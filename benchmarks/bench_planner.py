@@ -0,0 +1,73 @@
+"""Multi-season planning throughput (fields/sec) for each constraint set.
+
+For each number of fields, times :func:`planner.plan` end to end with and
+without the no-repeat and legume-rotation constraints, and the inference
+step alone: one batched call over fields x seasons
+(:func:`planner.season_probabilities`) against one call per season.
+
+Usage: python benchmarks/bench_planner.py [--fields 1000 10000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crop_prediction  # noqa: E402
+import planner  # noqa: E402
+
+CONSTRAINTS = {
+    'none': {'no_repeats': False, 'legume_rotation': False},
+    'no repeats': {'no_repeats': True, 'legume_rotation': False},
+    'legume rotation': {'no_repeats': False, 'legume_rotation': True},
+    'both': {'no_repeats': True, 'legume_rotation': True},
+}
+
+
+def best_seconds(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def per_season_probabilities(fields, artifact):
+    mapping = artifact['season_mapping']
+    return [crop_prediction._predict_proba(artifact, np.column_stack([fields, np.full(len(fields), code)]))
+            for code in sorted(mapping.values())]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fields', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    artifact = crop_prediction.get_artifact()
+    X = crop_prediction.load_dataset()[[f for f in artifact['features'] if f != 'season']].to_numpy(dtype=float)
+    rng = np.random.default_rng(0)
+
+    print(f"{'fields':>8} {'constraints':<16} {'fields/s':>10}")
+    results = []
+    for n_fields in args.fields:
+        fields = X[rng.integers(0, len(X), n_fields)]
+        batched = best_seconds(lambda: planner.season_probabilities(fields, artifact=artifact), args.repeat)
+        looped = best_seconds(lambda: per_season_probabilities(fields, artifact), args.repeat)
+        print(f"{n_fields:>8,} {'(inference)':<16} {n_fields / batched:>10,.0f}  batched; "
+              f"{n_fields / looped:,.0f} with one call per season")
+        results.append({'fields': n_fields, 'constraints': 'inference', 'fields_per_sec': n_fields / batched,
+                        'per_season_fields_per_sec': n_fields / looped})
+        for name, options in CONSTRAINTS.items():
+            seconds = best_seconds(lambda: planner.plan(fields, artifact=artifact, **options), args.repeat)
+            print(f"{n_fields:>8,} {name:<16} {n_fields / seconds:>10,.0f}")
+            results.append({'fields': n_fields, 'constraints': name, 'fields_per_sec': n_fields / seconds})
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Rows/sec for single-row ``predict_crop`` calls vs. batched ``predict_crops``.
+
+Usage: python benchmarks/bench_predict.py [--rows N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crop_prediction  # noqa: E402
+
+
+def legacy_predict_crop(artifact, temperature, humidity, ph, water_availability, season):
+    """The original per-call implementation, kept for comparison."""
+    input_data = pd.DataFrame([[temperature, humidity, ph, water_availability, season]],
+                              columns=artifact['features'])
+    prediction = artifact['model'].predict(input_data.to_numpy(dtype=float))
+    crop_mapping = {v: k for k, v in artifact['label_mapping'].items()}
+    return crop_mapping.get(prediction[0], "Unknown Crop")
+
+
+def rows_per_sec(fn, n_rows):
+    start = time.perf_counter()
+    fn()
+    return n_rows / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000, help="rows for the batch path")
+    parser.add_argument('--single-rows', type=int, default=2_000, help="rows for the single-row paths")
+    args = parser.parse_args(argv)
+
+    artifact = crop_prediction.get_artifact()
+    dataset = pd.read_csv(crop_prediction.DATA_PATH).drop(columns='label')
+    frame = dataset.sample(args.rows, replace=True, random_state=0).reset_index(drop=True)
+    rows = frame.head(args.single_rows).to_numpy().tolist()
+
+    results = {
+        'legacy single-row': rows_per_sec(
+            lambda: [legacy_predict_crop(artifact, *r[:4], artifact['season_mapping'][r[4]]) for r in rows],
+            len(rows)),
+        'predict_crop': rows_per_sec(lambda: [crop_prediction.predict_crop(*r) for r in rows], len(rows)),
+        'predict_crops (DataFrame)': rows_per_sec(lambda: crop_prediction.predict_crops(frame), len(frame)),
+        'predict_crops (ndarray)': rows_per_sec(
+            lambda: crop_prediction.predict_crops(frame.to_numpy()), len(frame)),
+    }
+    for name, rate in results.items():
+        print(f"{name:<28} {rate:>14,.0f} rows/sec")
+    return results
+
+
+if __name__ == '__main__':
+    main()
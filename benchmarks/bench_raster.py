@@ -0,0 +1,80 @@
+"""Raster scoring throughput (cells/sec) and memory for whole-region maps.
+
+Writes four random ``size`` x ``size`` float32 layers (in row bands, so they
+never sit in RAM whole), then scores them with :func:`raster.score_raster`
+for each tile size and worker count.  Peak RSS is measured per run in a
+fresh interpreter and compared with the size of the input layers.
+
+Usage: python benchmarks/bench_raster.py [--size 8192] [--tiles 256 512 1024] [--workers 1 2]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import crop_prediction  # noqa: E402
+
+RANGES = {'temperature': (10, 40), 'humidity': (20, 100), 'ph': (4, 9), 'water availability': (20, 300)}
+
+RUN_CODE = """
+import json, sys
+sys.path.insert(0, {root!r})
+import raster
+stats = raster.score_raster({layers!r}, 'rainy', {output!r}, {tile}, {workers})
+# VmHWM rather than ru_maxrss, which Linux carries over from the parent across exec
+with open('/proc/self/status') as f:
+    stats['peak_rss_mb'] = next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+print(json.dumps(stats))
+"""
+
+
+def write_layers(directory, size, seed=0, band=1024):
+    rng = np.random.default_rng(seed)
+    layers = {}
+    for feature, (low, high) in RANGES.items():
+        path = os.path.join(directory, feature.replace(' ', '_') + '.npy')
+        layer = np.lib.format.open_memmap(path, 'w+', np.float32, (size, size))
+        for start in range(0, size, band):
+            layer[start:start + band] = rng.uniform(low, high, (min(band, size - start), size))
+        layer.flush()
+        del layer
+        layers[feature] = path
+    return layers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=8192, help="raster edge in cells")
+    parser.add_argument('--tiles', type=int, nargs='+', default=[256, 512, 1024])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args(argv)
+
+    crop_prediction.get_artifact()  # make sure an artifact exists before the workers look for one
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        layers = write_layers(directory, args.size)
+        input_mb = 4 * args.size * args.size * 4 / 2 ** 20
+        print(f"{args.size:,} x {args.size:,} cells, {input_mb:,.0f} MB of input layers")
+        print(f"{'tile':>6} {'workers':>8} {'cells/sec':>12} {'seconds':>8} {'peak RSS MB':>12}")
+        for workers in sorted(set(args.workers)):
+            for tile in args.tiles:
+                code = RUN_CODE.format(root=ROOT, layers=layers, output=os.path.join(directory, 'out'),
+                                       tile=tile, workers=workers)
+                proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+                stats = json.loads(proc.stdout.strip().splitlines()[-1])
+                stats.update(tile=tile, workers=workers, input_mb=input_mb)
+                results.append(stats)
+                print(f"{tile:>6} {workers:>8} {stats['cells_per_sec']:>12,.0f} {stats['seconds']:>8.2f} "
+                      f"{stats['peak_rss_mb']:>12.1f}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Hot-swap latency of the model registry and memory per Streamlit session.
+
+Swaps: two artifact versions are trained into a temporary directory and
+``LATEST`` is flipped between them while a thread keeps predicting through
+:class:`model_registry.ModelRegistry`.  Reports the time from the flip until
+the new version serves (watcher poll + load + warm-up), the reference swap
+itself, and prediction latency during the swaps against a quiet baseline —
+in-flight predictions must never wait or fail.
+
+Sessions: ``streamlit.py`` is run under AppTest for 1 and then ``--sessions``
+independent sessions in a fresh interpreter; the RSS growth per extra
+session shows what a session costs on top of the shared artifact.
+
+Usage: python benchmarks/bench_registry.py [--swaps 20] [--sessions 10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import crop_prediction  # noqa: E402
+import model_store  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+SESSIONS_CODE = """
+import json, os, sys
+root = {root!r}
+sys.path = [p for p in sys.path if os.path.abspath(p or '.') != root]
+from streamlit.testing.v1 import AppTest
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmRSS')) / 1024
+
+os.chdir(root)
+apps = [AppTest.from_file(os.path.join(root, 'streamlit.py'), default_timeout=120)]
+apps[0].run()
+apps[0].run()
+first = rss_mb()
+for _ in range({sessions} - 1):
+    apps.append(AppTest.from_file(os.path.join(root, 'streamlit.py'), default_timeout=120))
+    apps[-1].run()
+    apps[-1].toggle(key='live').set_value(True).run()
+print(json.dumps({{'first_mb': first, 'last_mb': rss_mb(), 'sessions': len(apps)}}))
+"""
+
+
+def prediction_latencies(registry, stop, out, errors):
+    rng = np.random.default_rng(0)
+    while not stop.is_set():
+        row = rng.uniform([10, 20, 4, 20], [40, 100, 9, 300]).tolist()
+        start = time.perf_counter()
+        try:
+            crop_prediction.predict_crop(*row, 1, artifact=registry.current())
+        except Exception:
+            errors.append(1)
+        out.append(time.perf_counter() - start)
+
+
+def measure_swaps(swaps, interval):
+    warnings.filterwarnings('ignore')
+    with tempfile.TemporaryDirectory() as directory:
+        versions = [crop_prediction.train(directory=directory)['version'] for _ in range(2)]
+        registry = ModelRegistry(directory, interval=interval).start()
+
+        def run_load():
+            stop, latencies, errors = threading.Event(), [], []
+            thread = threading.Thread(target=prediction_latencies, args=(registry, stop, latencies, errors))
+            thread.start()
+            return stop, thread, latencies, errors
+
+        stop, thread, quiet, _ = run_load()
+        time.sleep(1.0)
+        stop.set()
+        thread.join()
+
+        stop, thread, busy, errors = run_load()
+        visible, loads, publishes = [], [], []
+        for i in range(swaps):
+            target = versions[i % 2]
+            if registry.current()['version'] == target:
+                target = versions[(i + 1) % 2]
+            start = time.perf_counter()
+            model_store._write_atomic(os.path.join(directory, model_store.LATEST_FILE), target)
+            while registry.current()['version'] != target:
+                time.sleep(0.001)
+            visible.append(time.perf_counter() - start)
+            loads.append(registry.last_load_seconds)
+            publishes.append(registry.last_swap_seconds)
+        stop.set()
+        thread.join()
+        registry.stop()
+
+    def ms(values, q):
+        return float(np.percentile(values, q) * 1000)
+
+    return {
+        'swaps': swaps,
+        'poll_interval_ms': interval * 1000,
+        'visible_ms_p50': ms(visible, 50),
+        'visible_ms_max': ms(visible, 100),
+        'load_ms_p50': ms(loads, 50),
+        'publish_us_p50': ms(publishes, 50) * 1000,
+        'predict_us_p50_quiet': ms(quiet, 50) * 1000,
+        'predict_us_p99_quiet': ms(quiet, 99) * 1000,
+        'predict_us_p50_swapping': ms(busy, 50) * 1000,
+        'predict_us_p99_swapping': ms(busy, 99) * 1000,
+        'predict_us_max_swapping': ms(busy, 100) * 1000,
+        'predictions_during_swaps': len(busy),
+        'errors': len(errors),
+    }
+
+
+def measure_sessions(sessions):
+    proc = subprocess.run([sys.executable, '-c', SESSIONS_CODE.format(root=ROOT, sessions=sessions)],
+                          capture_output=True, text=True, check=True, cwd=ROOT)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['mb_per_session'] = (result['last_mb'] - result['first_mb']) / max(result['sessions'] - 1, 1)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--swaps', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.05, help="registry polling period (s)")
+    parser.add_argument('--sessions', type=int, default=10, help="0 skips the Streamlit measurement")
+    args = parser.parse_args(argv)
+
+    swaps = measure_swaps(args.swaps, args.interval)
+    print(f"{swaps['swaps']} swaps, polling every {swaps['poll_interval_ms']:.0f} ms:")
+    print(f"  new version serving after  {swaps['visible_ms_p50']:8.1f} ms p50, {swaps['visible_ms_max']:.1f} ms max")
+    print(f"  load + warm-up             {swaps['load_ms_p50']:8.1f} ms p50 (off the request path)")
+    print(f"  reference swap             {swaps['publish_us_p50']:8.2f} µs p50")
+    print(f"  predict_crop quiet         {swaps['predict_us_p50_quiet']:8.1f} µs p50, "
+          f"{swaps['predict_us_p99_quiet']:.1f} µs p99")
+    print(f"  predict_crop while swapping{swaps['predict_us_p50_swapping']:8.1f} µs p50, "
+          f"{swaps['predict_us_p99_swapping']:.1f} µs p99, {swaps['predict_us_max_swapping']:.0f} µs max "
+          f"({swaps['predictions_during_swaps']:,} calls, {swaps['errors']} errors)")
+    results = {'swaps': swaps}
+    if args.sessions:
+        sessions = measure_sessions(args.sessions)
+        print(f"{sessions['sessions']} Streamlit sessions: {sessions['first_mb']:.1f} MB RSS with one, "
+              f"{sessions['last_mb']:.1f} MB with all -> {sessions['mb_per_session']:.2f} MB per extra session")
+        results['sessions'] = sessions
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Per-rerun execution time of ``streamlit.py`` under Streamlit's AppTest.
+
+Each rerun simulates a slider change, which is what happens on every widget
+interaction in the browser.
+
+Usage: python benchmarks/bench_streamlit.py [--reruns N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    # Import the installed package, not the repo's streamlit.py
+    sys.path = [p for p in sys.path if os.path.abspath(p or '.') != ROOT]
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(ROOT)
+    app = AppTest.from_file(os.path.join(ROOT, 'streamlit.py'), default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - start
+
+    timings = []
+    for i in range(args.reruns):
+        app.slider(key='temp').set_value(float(10 + i % 30))
+        start = time.perf_counter()
+        app.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"first run        {first * 1000:10.1f} ms")
+    print(f"rerun p50        {statistics.median(timings):10.1f} ms")
+    print(f"rerun p95        {timings[int(0.95 * (len(timings) - 1))]:10.1f} ms")
+    return {'first_run_ms': first * 1000, 'rerun_ms': timings}
+
+
+if __name__ == '__main__':
+    main()
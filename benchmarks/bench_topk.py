@@ -0,0 +1,78 @@
+"""Top-k recommendation throughput for k = 1, 3 and 13 on large batches.
+
+For each batch size, times the full :func:`crop_prediction.top_k_crops` path
+(encode, one ``predict_proba`` pass, calibration, top-k selection, name
+lookup) and, on the same probability matrix, the selection step alone
+(:func:`crop_prediction.top_k_indices`) against a full ``argsort`` and an
+``argpartition`` of every row.  Plain :func:`crop_prediction.predict_crops`
+is timed as the k = 1 baseline.
+
+Usage: python benchmarks/bench_topk.py [--rows 100000 1000000] [--k 1 3 13]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crop_prediction  # noqa: E402
+
+
+def best_seconds(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def argsort_top_k(proba, k):
+    order = np.argsort(-proba, axis=1)[:, :k]
+    return order, np.take_along_axis(proba, order, axis=1)
+
+
+def argpartition_top_k(proba, k):
+    n_columns = proba.shape[1]
+    top = np.argpartition(proba, n_columns - k, axis=1)[:, n_columns - k:]
+    order = np.argsort(np.take_along_axis(proba, top, axis=1), axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--k', type=int, nargs='+', default=[1, 3, 13])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    artifact = crop_prediction.get_artifact()
+    X = crop_prediction.load_dataset()[artifact['features']].to_numpy(dtype=float)
+    rng = np.random.default_rng(0)
+
+    print(f"{'rows':>10} {'k':>3} {'top_k_crops rows/s':>19} {'top_k_indices ms':>17} {'argsort ms':>11} {'argpartition ms':>16}")
+    results = []
+    for n_rows in args.rows:
+        batch = X[rng.integers(0, len(X), n_rows)]
+        seconds = best_seconds(lambda: crop_prediction.predict_crops(batch, artifact), args.repeat)
+        print(f"{n_rows:>10,} {'-':>3} {n_rows / seconds:>19,.0f} {'(predict_crops)':>17}")
+        results.append({'rows': n_rows, 'k': None, 'rows_per_sec': n_rows / seconds})
+        proba = crop_prediction._predict_proba(artifact, batch)
+        for k in args.k:
+            seconds = best_seconds(lambda: crop_prediction.top_k_crops(batch, k, artifact), args.repeat)
+            selection = best_seconds(lambda: crop_prediction.top_k_indices(proba, k), args.repeat)
+            full_sort = best_seconds(lambda: argsort_top_k(proba, k), args.repeat)
+            partial_sort = best_seconds(lambda: argpartition_top_k(proba, k), args.repeat)
+            results.append({'rows': n_rows, 'k': k, 'rows_per_sec': n_rows / seconds,
+                            'top_k_indices_ms': selection * 1000, 'argsort_ms': full_sort * 1000,
+                            'argpartition_ms': partial_sort * 1000})
+            print(f"{n_rows:>10,} {k:>3} {n_rows / seconds:>19,.0f} {selection * 1000:>17.1f} "
+                  f"{full_sort * 1000:>11.1f} {partial_sort * 1000:>16.1f}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Load generator for ``server.py``: throughput and p50/p95/p99 latency.
+
+Opens ``--concurrency`` keep-alive connections that each send requests back
+to back.  Unless ``--port`` points at a running server, one is started in a
+subprocess for the duration of the run.
+
+Usage: python benchmarks/load_generator.py [--concurrency 64] [--requests 20000]
+                                           [--batch-size 0] [--port PORT]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = {'temperature': 20.8, 'humidity': 82.0, 'ph': 6.5, 'water_availability': 202.9, 'season': 'rainy'}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+async def client(port, path, body, count, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    request = (f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+               f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await reader.readline()
+            length = 0
+            while (line := await reader.readline()) not in (b'\r\n', b''):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            if b' 200 ' not in status:
+                raise RuntimeError(f"unexpected response {status!r}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    if args.batch_size:
+        path, body = '/predict/batch', json.dumps({'rows': [SAMPLE] * args.batch_size}).encode()
+    else:
+        path, body = '/predict', json.dumps(SAMPLE).encode()
+    latencies = []
+    per_client = max(1, args.requests // args.concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args.port, path, body, per_client, latencies)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    rows = len(latencies) * max(args.batch_size, 1)
+    result = {
+        'concurrency': args.concurrency,
+        'requests': len(latencies),
+        'requests_per_sec': len(latencies) / elapsed,
+        'rows_per_sec': rows / elapsed,
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
+    print(f"{result['requests']:,} requests at concurrency {args.concurrency}: "
+          f"{result['requests_per_sec']:,.0f} req/s, {result['rows_per_sec']:,.0f} rows/s, "
+          f"p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--batch-size', type=int, default=0, help="rows per /predict/batch call (0 = /predict)")
+    parser.add_argument('--port', type=int, help="port of an already running server")
+    parser.add_argument('--max-delay-ms', type=float, default=2.0, help="batch window of the spawned server")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.port is None:
+        args.port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'server.py'), '--port', str(args.port),
+                                   '--max-delay-ms', str(args.max_delay_ms)], stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_for_server(args.port))
+        return asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""Reproducible benchmark suite: data load, encoding, training and prediction.
+
+``run`` measures every benchmark on the bundled CSV (scale 1) and on
+synthetic datasets of ``scale`` times as many rows, drawn with a fixed seed
+from the bundled data's per-crop, per-season feature distributions (see
+:mod:`synthetic`).  Results are
+written as JSON together with environment metadata (interpreter, library
+versions, CPU, git revision).  ``compare`` lines up two result files and
+exits with status 1 if any benchmark got slower by more than the threshold.
+
+Usage:
+    python benchmarks/suite.py run [--scales 1 10 100] [--out results.json]
+    python benchmarks/suite.py compare baseline.json candidate.json [--threshold 0.1]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import crop_prediction  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+HIGHER_IS_BETTER = {'rows/s'}
+
+
+def environment():
+    """Return the interpreter, library, hardware and git metadata of this run."""
+    import pandas as pd
+    import sklearn
+
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+        'git_commit': git('rev-parse', 'HEAD'),
+        'git_dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+    }
+
+
+def timings(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def record(results, name, scale, unit, samples, value=None):
+    results.append({
+        'benchmark': name,
+        'scale': scale,
+        'unit': unit,
+        'value': statistics.median(samples) if value is None else value,
+        'samples': samples,
+    })
+    print(f"  {name:<24} {results[-1]['value']:>14,.4g} {unit}")
+
+
+def streamlit_rerun_ms(reruns):
+    """Median rerun time of the Streamlit app, measured in a fresh interpreter."""
+    code = (f"import json, sys; sys.path.insert(0, {os.path.join(ROOT, 'benchmarks')!r}); "
+            f"import bench_streamlit; r = bench_streamlit.main(['--reruns', '{reruns}']); "
+            "print(json.dumps(r['rerun_ms']))")
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(scales, repeat=5, single_calls=5_000, batch_rows=100_000, streamlit_reruns=30, seed=0):
+    """Run the suite and return ``{'environment': ..., 'results': [...]}``."""
+    import pandas as pd
+
+    import dataset_cache
+    import synthetic
+
+    warnings.filterwarnings('ignore')
+    distributions = synthetic.fit()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            print(f"scale {scale}:")
+            if scale == 1:
+                path = crop_prediction.DATA_PATH
+            else:
+                path = os.path.join(tmp, f'synthetic_x{scale}.csv')
+                synthetic.generate(path, 1400 * scale, seed, distributions=distributions)
+            cache_dir = os.path.join(tmp, 'cache')
+            artifacts = os.path.join(tmp, f'artifacts_x{scale}')
+
+            record(results, 'csv_load', scale, 's', timings(lambda: pd.read_csv(path), repeat))
+            raw = pd.read_csv(path)
+            record(results, 'encode', scale, 's',
+                   timings(lambda: crop_prediction.encode_dataset(raw.copy()), repeat))
+
+            def rebuild_cache():
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                dataset_cache.prepare(path, cache_dir)
+
+            record(results, 'cache_prepare', scale, 's', timings(rebuild_cache, repeat))
+            record(results, 'cache_load', scale, 's',
+                   timings(lambda: dataset_cache.load_frame(path, cache_dir), repeat))
+            # Training reads the temporary cache, built outside the timed repeats
+            dataset_cache.prepare(path, cache_dir)
+            record(results, 'train', scale, 's',
+                   timings(lambda: crop_prediction.train(path, artifacts, cache_dir=cache_dir), min(repeat, 3)))
+
+            artifact = crop_prediction.load_model(directory=artifacts)
+            X = crop_prediction.load_dataset(path, cache_dir=cache_dir)[artifact['features']].to_numpy(dtype=float)
+            rows = X[np.random.default_rng(seed).integers(0, len(X), single_calls)].tolist()
+            calls = [timings(lambda: crop_prediction.predict_crop(*row, artifact=artifact), 1)[0] for row in rows]
+            record(results, 'predict_crop_p50', scale, 'us', [float(np.percentile(calls, 50) * 1e6)])
+            record(results, 'predict_crop_p99', scale, 'us', [float(np.percentile(calls, 99) * 1e6)])
+            batch = X[np.random.default_rng(seed).integers(0, len(X), batch_rows)]
+            batch_seconds = timings(lambda: crop_prediction.predict_crops(batch, artifact), repeat)
+            record(results, 'predict_crops', scale, 'rows/s', batch_seconds,
+                   value=batch_rows / statistics.median(batch_seconds))
+
+    if 1 in scales and streamlit_reruns:
+        record(results, 'streamlit_rerun', 1, 'ms', streamlit_rerun_ms(streamlit_reruns))
+    return {'environment': environment(), 'results': results}
+
+
+def compare(baseline, candidate, threshold=0.10):
+    """Return one row per benchmark present in both runs, flagging regressions.
+
+    ``change`` is the relative change in the "worse" direction: positive
+    means slower (or lower throughput).
+    """
+    before = {(r['benchmark'], r['scale']): r for r in baseline['results']}
+    rows = []
+    for result in candidate['results']:
+        old = before.get((result['benchmark'], result['scale']))
+        if old is None or not old['value']:
+            continue
+        change = result['value'] / old['value'] - 1
+        if result['unit'] in HIGHER_IS_BETTER:
+            change = old['value'] / result['value'] - 1
+        rows.append({
+            'benchmark': result['benchmark'],
+            'scale': result['scale'],
+            'unit': result['unit'],
+            'baseline': old['value'],
+            'candidate': result['value'],
+            'change': change,
+            'regression': change > threshold,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help="run the suite and write a JSON result file")
+    run_parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--streamlit-reruns', type=int, default=30, help="0 skips the Streamlit benchmark")
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--out', help=f"result file (default: {os.path.relpath(RESULTS_DIR, ROOT)}/<time>.json)")
+    compare_parser = subparsers.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run(args.scales, args.repeat, streamlit_reruns=args.streamlit_reruns, seed=args.seed)
+        out = args.out or os.path.join(
+            RESULTS_DIR, f"{report['environment']['timestamp'].replace(':', '')}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {out}")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+    rows = compare(baseline, candidate, args.threshold)
+    print(f"{'benchmark':<24} {'scale':>6} {'baseline':>12} {'candidate':>12} {'unit':>6} {'change':>8}")
+    for row in rows:
+        flag = '  ❌ regression' if row['regression'] else ''
+        print(f"{row['benchmark']:<24} {row['scale']:>6} {row['baseline']:>12,.4g} {row['candidate']:>12,.4g} "
+              f"{row['unit']:>6} {row['change']:>+8.1%}{flag}")
+    for label, env in (('baseline', baseline['environment']), ('candidate', candidate['environment'])):
+        print(f"{label}: {env['git_commit'] and env['git_commit'][:8]}{' (dirty)' if env['git_dirty'] else ''} "
+              f"python {env['python']} numpy {env['numpy']} on {env['cpu_count']} CPUs, {env['timestamp']}")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
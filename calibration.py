@@ -0,0 +1,65 @@
+"""Temperature scaling and calibration metrics for class probabilities.
+
+A classifier is calibrated when, of all the rows it gives probability ``p``,
+a fraction ``p`` are correct.  :func:`fit_temperature` finds the single
+temperature ``T`` that minimizes the held-out log-loss of ``p ** (1 / T)``
+(renormalized); for a softmax model that is exactly ``softmax(z / T)``.  The
+ranking of classes, and therefore every prediction, is unchanged.
+"""
+import numpy as np
+
+EPS = 1e-15
+
+
+def apply_temperature(proba, temperature):
+    """Return ``proba`` rescaled by ``temperature`` (``1.0`` returns it as-is)."""
+    if temperature == 1.0:
+        return proba
+    scaled = np.log(np.maximum(proba, EPS))
+    scaled /= temperature
+    scaled -= scaled.max(axis=-1, keepdims=True)
+    np.exp(scaled, out=scaled)
+    scaled /= scaled.sum(axis=-1, keepdims=True)
+    return scaled
+
+
+def log_loss(proba, y_index):
+    """Mean negative log-likelihood of the true classes ``y_index``."""
+    return float(-np.log(np.maximum(proba[np.arange(len(proba)), y_index], EPS)).mean())
+
+
+def expected_calibration_error(proba, y_index, bins=15):
+    """Confidence-weighted gap between top-1 confidence and accuracy."""
+    confidence = proba.max(axis=1)
+    correct = proba.argmax(axis=1) == y_index
+    which = np.minimum((confidence * bins).astype(int), bins - 1)
+    counts = np.bincount(which, minlength=bins)
+    gap = np.abs(np.bincount(which, confidence, bins) - np.bincount(which, correct, bins))
+    return float(gap.sum() / max(counts.sum(), 1))
+
+
+def fit_temperature(proba, y_index, bounds=(0.05, 20.0)):
+    """Return the temperature minimizing the log-loss of ``proba`` on ``y_index``."""
+    from scipy.optimize import minimize_scalar
+
+    result = minimize_scalar(lambda t: log_loss(apply_temperature(proba, np.exp(t)), y_index),
+                             bounds=np.log(bounds), method='bounded')
+    return float(np.exp(result.x))
+
+
+def calibrate(proba, y_index, temperature=None):
+    """Report before/after metrics of ``temperature`` on held-out ``proba``.
+
+    Without a ``temperature`` one is fitted on ``proba`` itself, which makes
+    the "after" numbers in-sample.
+    """
+    if temperature is None:
+        temperature = fit_temperature(proba, y_index)
+    calibrated = apply_temperature(proba, temperature)
+    return {
+        'temperature': temperature,
+        'log_loss_before': log_loss(proba, y_index),
+        'log_loss_after': log_loss(calibrated, y_index),
+        'ece_before': expected_calibration_error(proba, y_index),
+        'ece_after': expected_calibration_error(calibrated, y_index),
+    }
@@ -1,86 +1,627 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.metrics import classification_report, accuracy_score
+"""Crop recommendation model: training CLI and prediction library.
+
+Importing this module has no side effects and only loads NumPy and the
+artifact loader; pandas, scikit-learn and the plotting libraries are imported
+by the commands that need them (training, reports, CSV scoring).
+"""
+import argparse
 import os
+import sys
+import time
+
+import numpy as np
+
+import calibration
+import linear_kernel
+import metrics
+import monitoring
+import schema
+from model_store import ARTIFACT_DIR, load_artifact, save_artifact
+from schema import FEATURES, LABEL, label_mapping, season_mapping  # noqa: F401  (re-exported)
 
 # Optional for Streamlit — uncomment if using
 # import streamlit as st
 
-# --- Debug: Check current directory and files
-print("Current directory:", os.getcwd())
-print("Files here:", os.listdir())
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Crop_recommendation.csv")
+# Share of the training split held out to fit the probability temperature
+CALIBRATION_SIZE = 0.2
+
+expected_columns = FEATURES + [LABEL]
+
 
 # --- Load the dataset ---
-try:
-    dataset = pd.read_csv("crop_recommendation.csv")  # Ensure correct case
-except FileNotFoundError:
-    print("❌ File not found. Please make sure 'crop_recommendation.csv' is in the same folder.")
-    exit()
-
-# --- Check columns ---
-print("Columns:", dataset.columns.tolist())
-
-# --- Ensure correct column names ---
-expected_columns = ['temperature', 'humidity', 'ph', 'water availability', 'season', 'label']
-missing_cols = [col for col in expected_columns if col not in dataset.columns]
-if missing_cols:
-    print(f"❌ Missing columns in dataset: {missing_cols}")
-    exit()
-
-# --- Map categorical values to numeric ---
-label_mapping = {
-    'rice': 1, 'maize': 2, 'chickpea': 3, 'kidneybeans': 4, 'pigeonpeas': 5,
-    'mothbeans': 6, 'mungbean': 7, 'blackgram': 8, 'lentil': 9,
-    'watermelon': 10, 'muskmelon': 11, 'cotton': 12, 'jute': 13
-}
-season_mapping = {'rainy': 1, 'winter': 2, 'spring': 3, 'summer': 4}
-
-dataset['label'] = dataset['label'].map(label_mapping)
-dataset['season'] = dataset['season'].map(season_mapping)
-
-# --- Check for NaNs ---
-if dataset.isnull().sum().any():
-    print("❌ Dataset contains missing values after mapping:")
-    print(dataset.isnull().sum())
-    exit()
-
-# --- Features and target ---
-X = dataset[['temperature', 'humidity', 'ph', 'water availability', 'season']]
-y = dataset['label']
-
-# --- Train-test split ---
-x_train, x_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
-
-# --- Train Logistic Regression Model ---
-model = LogisticRegression(max_iter=200, solver='lbfgs', multi_class='multinomial')
-model.fit(x_train, y_train)
-
-# --- Evaluate ---
-y_pred = model.predict(x_test)
-accuracy = accuracy_score(y_test, y_pred)
-print("✅ Accuracy of the model:", round(accuracy * 100, 2), "%")
-print("\nClassification Report:\n", classification_report(y_test, y_pred))
-
-# --- Pairplot visualization (optional for Streamlit) ---
-try:
-    pairplot_fig = sns.pairplot(dataset[['temperature', 'humidity', 'ph', 'water availability', 'label']], hue='label')
-    plt.show()
+def encode_dataset(dataset):
+    """Encode ``label``/``season`` of a raw dataset frame as integers, in place.
+
+    Raises ``ValueError`` if columns are missing or values cannot be mapped.
+    """
+    missing_cols = [col for col in expected_columns if col not in dataset.columns]
+    if missing_cols:
+        raise ValueError(f"Missing columns in dataset: {missing_cols}")
+
+    with metrics.timer('encode'):
+        dataset['label'] = dataset['label'].map(label_mapping)
+        dataset['season'] = dataset['season'].map(season_mapping)
+
+    if dataset.isnull().sum().any():
+        raise ValueError(f"Dataset contains missing values after mapping:\n{dataset.isnull().sum()}")
+    return dataset
+
+
+@metrics.timed('dataset_load')
+def load_dataset(path=DATA_PATH, use_cache=True, cache_dir=None):
+    """Return the dataset at ``path`` with ``label``/``season`` encoded as integers.
+
+    By default the pre-encoded binary copy kept by :mod:`dataset_cache` is
+    used (built on first use and whenever the CSV changes, under
+    ``cache_dir`` or :data:`dataset_cache.CACHE_DIR`); pass
+    ``use_cache=False`` to parse the CSV directly.
+    """
+    if use_cache:
+        import dataset_cache
+        return dataset_cache.load_frame(path, cache_dir or dataset_cache.CACHE_DIR)
+
+    import pandas as pd
+
+    return encode_dataset(pd.read_csv(path))
+
+
+# --- Train and persist the model ---
+def train(path=DATA_PATH, directory=ARTIFACT_DIR, verbose=False, model_name='logistic_regression', params=None,
+          extra_metadata=None, cache_dir=None):
+    """Fit the model on the dataset at ``path`` and save it as a new artifact version.
+
+    ``path`` is a CSV or a binary dataset directory (see :func:`dataset_cache.load`);
+    ``model_name`` selects an estimator from :data:`model_zoo.MODELS` and
+    ``params`` are passed to its factory (see :mod:`tuning`); both end up in
+    the metadata, with ``extra_metadata`` merged on top.  ``cache_dir``
+    overrides where the binary copy of a CSV is kept.
+    Returns the artifact dict, as :func:`model_store.load_artifact` would.
+    """
+    from sklearn.metrics import accuracy_score, classification_report
+
+    import dataset_cache
+    import model_zoo
+
+    # float32/int8 columns, memory-mapped; only the split arrays are materialized
+    with metrics.timer('dataset_load'):
+        data = dataset_cache.load(path, cache_dir or dataset_cache.CACHE_DIR)
+    with metrics.timer('split'):
+        x_train, x_test, y_train, y_test = schema.train_test_arrays(data, test_size=0.3, random_state=42)
+
+    params = dict(params or {})
+    model = model_zoo.make_model(model_name, **params)
+    with metrics.timer('fit'):
+        start = time.perf_counter()
+        model.fit(x_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+    with metrics.timer('calibrate'):
+        temperature = fit_calibration(x_train, y_train, model_name, params)
+    with metrics.timer('evaluate'):
+        y_pred = model.predict(x_test)
+        accuracy = accuracy_score(y_test, y_pred)
+        calibrated = calibration.calibrate(model.predict_proba(x_test), np.searchsorted(model.classes_, y_test),
+                                           temperature)
+    if verbose:
+        print("✅ Accuracy of the model:", round(accuracy * 100, 2), "%")
+        print("\nClassification Report:\n", classification_report(y_test, y_pred))
+        print(f"🎚️ Probability temperature {calibrated['temperature']:.2f}: calibration error "
+              f"{calibrated['ece_before']:.3f} -> {calibrated['ece_after']:.3f}, log-loss "
+              f"{calibrated['log_loss_before']:.3f} -> {calibrated['log_loss_after']:.3f}")
+
+    metadata = {
+        'label_mapping': label_mapping,
+        'season_mapping': season_mapping,
+        'features': FEATURES,
+        'accuracy': accuracy,
+        'n_samples': len(data['label']),
+        'dataset_sha256': data['meta']['source_sha256'],
+        'model_name': model_name,
+        'model_class': type(model).__name__,
+        'model_params': params,
+        'n_iter': n_iterations(model),
+        'fit_seconds': fit_seconds,
+        'calibration': calibrated,
+        'feature_stats': monitoring.training_stats(x_train, y_train, FEATURES),
+    }
+    metadata.update(extra_metadata or {})
+    # Export raw weights for the NumPy kernel only if it reproduces the model exactly
+    # (serving feeds float64 rows, so that is what the kernel must match)
+    weights = linear_kernel.extract_weights(model)
+    if weights is not None and not linear_kernel.verify(model, weights, x_test.astype(float)):
+        weights = None
+    metadata['kernel_verified'] = weights is not None
+    version = save_artifact(model, metadata, directory, weights)
+    artifact = dict(metadata, version=version, model=model)
+    if weights is not None:
+        artifact['weights'] = weights
+    return artifact
+
+
+def fit_calibration(x_train, y_train, model_name='logistic_regression', params=None):
+    """Return the probability temperature, fitted on a held-out slice of the training split.
+
+    A copy of the model is fitted on the rest of ``x_train`` and scored on the
+    slice (:data:`CALIBRATION_SIZE`, stratified), so the test split stays
+    untouched for reporting the calibration.
+    """
+    from sklearn.model_selection import StratifiedShuffleSplit
+
+    import model_zoo
+
+    splitter = StratifiedShuffleSplit(n_splits=1, test_size=CALIBRATION_SIZE, random_state=42)
+    fit_idx, held_out_idx = next(splitter.split(x_train, y_train))
+    model = model_zoo.make_model(model_name, **(params or {})).fit(x_train[fit_idx], y_train[fit_idx])
+    return calibration.fit_temperature(model.predict_proba(x_train[held_out_idx]),
+                                       np.searchsorted(model.classes_, y_train[held_out_idx]))
+
+
+def n_iterations(model):
+    """Return the solver iterations a fitted model took, or ``None`` if it has no such notion."""
+    estimator = model.steps[-1][1] if hasattr(model, 'steps') else model
+    n_iter = getattr(estimator, 'n_iter_', None)
+    return None if n_iter is None else int(np.max(n_iter))
+
+
+def load_model(version=None, directory=ARTIFACT_DIR):
+    """Load a saved artifact, training one first if none exists yet."""
+    try:
+        return load_artifact(version, directory)
+    except FileNotFoundError:
+        if version is not None:
+            raise
+        return train(directory=directory)
 
-    # If using Streamlit:
-    # st.pyplot(pairplot_fig)
-except Exception as e:
-    print("⚠️ Could not render pairplot:", e)
 
 # --- Prediction Function ---
-def predict_crop(temperature, humidity, ph, water_availability, season):
-    input_data = pd.DataFrame([[temperature, humidity, ph, water_availability, season]],
-                              columns=['temperature', 'humidity', 'ph', 'water availability', 'season'])
-    prediction = model.predict(input_data)
-    crop_mapping = {v: k for k, v in label_mapping.items()}
-    return crop_mapping.get(prediction[0], "Unknown Crop")
-
-# --- Test Example ---
-print("🔎 Predicted Crop:", predict_crop(20, 82.1, 6.11, 202.12, 1))
+_artifact = None
+
+
+def get_artifact():
+    """Return the process-wide artifact, loading it on first use."""
+    global _artifact
+    if _artifact is None:
+        _artifact = load_model()
+    return _artifact
+
+
+def _crop_lookup(artifact):
+    """Return an array mapping label codes to crop names, cached on ``artifact``."""
+    lookup = artifact.get('crop_lookup')
+    if lookup is None:
+        codes = artifact['label_mapping']
+        lookup = np.full(max(codes.values()) + 1, "Unknown Crop", dtype=object)
+        for name, code in codes.items():
+            lookup[code] = name
+        artifact['crop_lookup'] = lookup
+    return lookup
+
+
+def _kernel(artifact):
+    """Return the artifact's :class:`linear_kernel.LinearKernel`, or ``None``."""
+    if 'kernel' not in artifact:
+        weights = artifact.get('weights')
+        artifact['kernel'] = linear_kernel.LinearKernel.from_weights(weights, artifact) if weights else None
+    return artifact['kernel']
+
+
+def _temperature(artifact):
+    return artifact.get('calibration', {}).get('temperature', 1.0)
+
+
+def _predict_proba(artifact, X):
+    """Return temperature-calibrated class probabilities (see :mod:`calibration`)."""
+    kernel = _kernel(artifact)
+    if kernel is not None:
+        return kernel.predict_proba(X, _temperature(artifact))
+    return calibration.apply_temperature(artifact['model'].predict_proba(X), _temperature(artifact))
+
+
+def encode_seasons(seasons, season_mapping=season_mapping):
+    """Encode season names (or validate season codes) in one vectorized pass.
+
+    Names and codes may be mixed.  Raises ``ValueError`` listing the values
+    that are neither, if any.
+    """
+    seasons = np.asarray(seasons)
+    if seasons.dtype.kind in 'iuf':
+        codes = seasons.astype(float)
+        valid = np.isin(codes, list(season_mapping.values()))
+    else:
+        names = np.array(sorted(season_mapping))
+        seasons = seasons.astype(str)
+        pos = np.searchsorted(names, seasons).clip(max=len(names) - 1)
+        valid = names[pos] == seasons
+        codes = np.array([season_mapping[n] for n in names], dtype=float)[pos]
+        # A batch mixing codes and names arrives as strings; accept the ones spelling a valid code
+        known_codes = set(season_mapping.values())
+        for i in np.flatnonzero(~valid):
+            try:
+                code = float(seasons[i])
+            except ValueError:
+                continue
+            if code in known_codes:
+                codes[i], valid[i] = code, True
+    if not valid.all():
+        raise ValueError(f"Unknown season values: {sorted(set(seasons[~valid].tolist()))}")
+    return codes
+
+
+def to_feature_matrix(batch, artifact=None):
+    """Convert ``batch`` into a float matrix ordered as ``artifact['features']``.
+
+    ``batch`` may be a DataFrame (or dict of columns) with the feature
+    columns, a list of dicts keyed by feature name (``water_availability`` is
+    accepted as well), or a 2-D array/list of rows in feature order.  Seasons may be names or codes.
+    """
+    artifact = artifact or get_artifact()
+    features = artifact['features']
+    if isinstance(batch, list) and batch and isinstance(batch[0], dict):
+        keys = {key.replace('_', ' '): key for key in batch[0]}
+        batch = {feature: [row[keys[feature]] for row in batch] for feature in features if feature in keys}
+    if isinstance(batch, dict) or hasattr(batch, 'columns'):
+        columns = {str(c).replace('_', ' '): c for c in (batch if isinstance(batch, dict) else batch.columns)}
+        missing = [f for f in features if f not in columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        X = np.empty((len(batch[columns[features[0]]]), len(features)))
+        for i, feature in enumerate(features):
+            column = np.asarray(batch[columns[feature]])
+            X[:, i] = encode_seasons(column, artifact['season_mapping']) if feature == 'season' else column
+    else:
+        batch = np.asarray(batch)
+        if batch.size == 0:
+            batch = batch.reshape(0, len(features))
+        if batch.ndim != 2 or batch.shape[1] != len(features):
+            raise ValueError(f"Expected rows of {len(features)} features {features}, got shape {batch.shape}")
+        season_col = features.index('season')
+        if batch.dtype.kind in 'iuf':
+            X = batch.astype(float)
+            encode_seasons(X[:, season_col], artifact['season_mapping'])
+        else:
+            X = np.empty(batch.shape)
+            numeric = [i for i in range(len(features)) if i != season_col]
+            X[:, numeric] = batch[:, numeric].astype(float)
+            X[:, season_col] = encode_seasons(batch[:, season_col], artifact['season_mapping'])
+    if not np.isfinite(X).all():
+        raise ValueError("Features must be finite numbers")
+    return X
+
+
+@metrics.timed('predict_crops')
+def predict_crops(batch, artifact=None):
+    """Predict a crop name for every row of ``batch`` in one model call.
+
+    See :func:`to_feature_matrix` for the accepted input shapes.  Returns an
+    object array of crop names.
+    """
+    artifact = artifact or get_artifact()
+    X = to_feature_matrix(batch, artifact)
+    if len(X) == 0:
+        return np.empty(0, dtype=object)
+    kernel = _kernel(artifact)
+    labels = kernel.predict(X) if kernel is not None else artifact['model'].predict(X)
+    metrics.increment('predicted_rows', len(X))
+    if metrics.enabled():
+        monitoring.record(artifact, X, labels)
+    return _crop_lookup(artifact)[labels]
+
+
+# Widest probability matrix for which a full sort beats argpartition (measured)
+ARGSORT_MAX_COLUMNS = 128
+
+
+def top_k_indices(proba, k):
+    """Return column indices and values of the ``k`` largest entries per row.
+
+    Uses ``argmax`` for ``k == 1``.  Otherwise a row-wise ``argsort`` is
+    faster than ``argpartition`` for narrow matrices (13 crops); with
+    hundreds of columns ``argpartition`` wins, and only the ``k`` selected
+    columns are then sorted.
+    """
+    n_columns = proba.shape[1]
+    k = min(k, n_columns)
+    if k == 1:
+        top = proba.argmax(axis=1).reshape(-1, 1)
+    elif n_columns <= ARGSORT_MAX_COLUMNS or 2 * k >= n_columns:
+        top = np.argsort(proba, axis=1)[:, :-k - 1:-1]
+    else:
+        top = np.argpartition(proba, n_columns - k, axis=1)[:, n_columns - k:]
+        order = np.argsort(np.take_along_axis(proba, top, axis=1), axis=1)[:, ::-1]
+        top = np.take_along_axis(top, order, axis=1)
+    return top, np.take_along_axis(proba, top, axis=1)
+
+
+def _classes(artifact):
+    """Return the label code of each column of the model's ``predict_proba`` output."""
+    weights = artifact.get('weights')
+    return np.asarray(weights['classes'] if weights else artifact['model'].classes_)
+
+
+def class_names(artifact):
+    """Return the crop name of each column of the model's ``predict_proba`` output."""
+    return _crop_lookup(artifact)[_classes(artifact)]
+
+
+@metrics.timed('top_k_crops')
+def top_k_crops(batch, k=3, artifact=None):
+    """Return the ``k`` most probable crops per row and their probabilities.
+
+    Both results have shape ``(len(batch), k)`` and are ordered from most to
+    least probable.  Probabilities come from one ``predict_proba`` pass and
+    are calibrated with the artifact's temperature.
+    """
+    artifact = artifact or get_artifact()
+    names = class_names(artifact)
+    X = to_feature_matrix(batch, artifact)
+    k = min(k, len(names))
+    if len(X) == 0:
+        return np.empty((0, k), dtype=object), np.empty((0, k))
+    top, top_proba = top_k_indices(_predict_proba(artifact, X), k)
+    if metrics.enabled():
+        monitoring.record(artifact, X, _classes(artifact)[top[:, 0]])
+    return names[top], top_proba
+
+
+@metrics.timed('predict_crop')
+def predict_crop(temperature, humidity, ph, water_availability, season, artifact=None):
+    artifact = artifact or get_artifact()
+    row = [temperature, humidity, ph, water_availability, season]
+    kernel = _kernel(artifact)
+    if kernel is not None:
+        label = kernel.predict_row(row)
+        if metrics.enabled():
+            monitoring.record_row(artifact, row, label)
+        return _crop_lookup(artifact)[label]
+    return predict_crops([row], artifact)[0]
+
+
+@metrics.timed('recommend_crops')
+def recommend_crops(temperature, humidity, ph, water_availability, season, k=3, artifact=None):
+    """Return the ``k`` most suitable crops for one field, best first.
+
+    The result is a tuple of ``(crop, probability)`` pairs; probabilities are
+    calibrated as in :func:`top_k_crops`.
+    """
+    artifact = artifact or get_artifact()
+    row = [temperature, humidity, ph, water_availability, season]
+    kernel = _kernel(artifact)
+    if kernel is None:
+        crops, proba = top_k_crops([row], k, artifact)
+        return tuple(zip(crops[0].tolist(), proba[0].tolist()))
+    proba = kernel.predict_proba_row(row, _temperature(artifact))
+    top, top_proba = top_k_indices(proba.reshape(1, -1), k)
+    if metrics.enabled():
+        monitoring.record_row(artifact, row, _classes(artifact)[top[0, 0]])
+    return tuple(zip(class_names(artifact)[top[0]].tolist(), top_proba[0].tolist()))
+
+
+# --- Pairplot visualization ---
+def show_pairplot(path=DATA_PATH):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    dataset = load_dataset(path)
+    sns.pairplot(dataset[['temperature', 'humidity', 'ph', 'water availability', 'label']], hue='label')
+    plt.show()
+
+
+def _positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and query the crop recommendation model.")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="record timings and write them to PATH (.json, otherwise Prometheus text)")
+    subparsers = parser.add_subparsers(dest='command')
+
+    train_parser = subparsers.add_parser('train', help="fit the model and save a new artifact version")
+    train_parser.add_argument('--data', default=DATA_PATH, help="training CSV")
+    train_parser.add_argument('--artifacts', default=ARTIFACT_DIR, help="artifact directory")
+    train_parser.add_argument('--model', default='logistic_regression',
+                              help="estimator to train (see the 'zoo' command)")
+
+    tune_parser = subparsers.add_parser('tune', help="search logistic-regression settings, then train the best")
+    tune_parser.add_argument('--data', default=DATA_PATH, help="training CSV")
+    tune_parser.add_argument('--artifacts', default=ARTIFACT_DIR, help="artifact directory")
+    tune_parser.add_argument('--folds', type=int, default=5)
+    tune_parser.add_argument('--jobs', type=int, default=-1, help="parallel fits (-1 = all cores)")
+
+    update_parser = subparsers.add_parser('update', help="incrementally update an online model with new rows")
+    update_parser.add_argument('data', help="CSV of new labelled rows")
+    update_parser.add_argument('--artifacts', default=ARTIFACT_DIR, help="artifact directory")
+    update_parser.add_argument('--epochs', type=int, default=1, help="passes over the new rows")
+
+    generate_parser = subparsers.add_parser('generate', help="write a synthetic dataset for scale testing")
+    generate_parser.add_argument('output', help="output .csv file, or a directory for the binary format")
+    generate_parser.add_argument('--rows', type=int, required=True)
+    generate_parser.add_argument('--seed', type=int, default=0)
+    generate_parser.add_argument('--chunk-rows', type=int, default=1_000_000, help="rows generated per chunk")
+    generate_parser.add_argument('--workers', type=int, default=1, help="worker processes (0 = one per core)")
+    generate_parser.add_argument('--format', choices=['csv', 'binary'], help="output format (default: from extension)")
+    generate_parser.add_argument('--data', default=DATA_PATH, help="dataset whose distributions are sampled")
+
+    zoo_parser = subparsers.add_parser('zoo', help="cross-validate and benchmark candidate models")
+    zoo_parser.add_argument('--data', default=DATA_PATH, help="training CSV")
+    zoo_parser.add_argument('--models', nargs='+', help="models to compare (default: all)")
+    zoo_parser.add_argument('--folds', type=int, default=5)
+    zoo_parser.add_argument('--jobs', type=int, default=-1, help="parallel CV fits (-1 = all cores)")
+
+    report_parser = subparsers.add_parser('report', help="show a pairplot of the dataset")
+    report_parser.add_argument('--data', default=DATA_PATH, help="dataset CSV")
+
+    predict_parser = subparsers.add_parser('predict', help="predict a crop with the latest artifact")
+    predict_parser.add_argument('temperature', type=float)
+    predict_parser.add_argument('humidity', type=float)
+    predict_parser.add_argument('ph', type=float)
+    predict_parser.add_argument('water_availability', type=float)
+    predict_parser.add_argument('season', choices=list(season_mapping))
+    predict_parser.add_argument('--top-k', type=int, default=1, help="also list the k most suitable crops")
+    predict_parser.add_argument('--profile', choices=['cpu', 'memory'],
+                                help="profile the prediction with cProfile or tracemalloc")
+
+    score_parser = subparsers.add_parser('score', help="stream a CSV of field records through the model")
+    score_parser.add_argument('input', help="CSV with the feature columns")
+    score_parser.add_argument('-o', '--output', required=True, help="output .csv or .parquet file")
+    score_parser.add_argument('--chunksize', type=int, default=100_000, help="rows read per chunk")
+    score_parser.add_argument('--top-k', type=int, default=0, help="also write the k most probable crops")
+    score_parser.add_argument('--format', choices=['csv', 'parquet'], help="output format (default: from extension)")
+    score_parser.add_argument('--workers', type=int, default=1, help="worker processes (0 = one per core)")
+
+    plan_parser = subparsers.add_parser('plan', help="plan a season-by-season crop rotation for every field")
+    plan_parser.add_argument('input', help="CSV of fields with the numeric feature columns")
+    plan_parser.add_argument('-o', '--output', required=True, help="output CSV")
+    plan_parser.add_argument('--seasons', nargs='+', choices=list(season_mapping), help="seasons to plan, in order")
+    plan_parser.add_argument('--allow-repeats', action='store_true', help="allow a crop in several seasons")
+    plan_parser.add_argument('--no-legume-rotation', action='store_true',
+                             help="allow consecutive seasons without a legume")
+
+    raster_parser = subparsers.add_parser('raster', help="score aligned .npy raster layers into suitability maps")
+    for feature in ('temperature', 'humidity', 'ph', 'water-availability'):
+        raster_parser.add_argument(f'--{feature}', required=True, metavar='NPY', help=f"2-D {feature} layer")
+    raster_parser.add_argument('--season', required=True, choices=list(season_mapping))
+    raster_parser.add_argument('-o', '--output', required=True, help="output directory")
+    raster_parser.add_argument('--tile', type=_positive_int, default=512, help="tile edge in cells")
+    raster_parser.add_argument('--workers', type=int, default=1, help="worker processes (0 = one per core)")
+
+    grid_parser = subparsers.add_parser('grid', help="precompute a decision grid for the latest artifact")
+    grid_parser.add_argument('--step', action='append', default=[], metavar='FEATURE=STEP',
+                             help="grid step for a feature, e.g. --step ph=0.1 (repeatable)")
+    grid_parser.add_argument('--with-proba', action='store_true', help="also store class probabilities")
+    grid_parser.add_argument('--report', action='store_true',
+                             help="compare grid resolutions against the exact model instead of saving")
+
+    args = parser.parse_args(argv)
+    command = args.command or 'train'
+    if args.metrics:
+        metrics.enable()
+
+    try:
+        if command == 'train':
+            artifact = train(getattr(args, 'data', DATA_PATH), getattr(args, 'artifacts', ARTIFACT_DIR),
+                             verbose=True, model_name=getattr(args, 'model', 'logistic_regression'))
+            print("💾 Saved model artifact:", artifact['version'])
+        elif command == 'tune':
+            import tuning
+            search = tuning.tune(args.data, args.folds, n_jobs=args.jobs, verbose=True)
+            print(f"🏆 Best of {search['candidates']} candidates: {search['best']} "
+                  f"(CV accuracy {search['cv_accuracy']:.2%}, {search['seconds']:.1f}s)")
+            artifact = train(args.data, args.artifacts, verbose=True, params=search['best'],
+                             extra_metadata={'tuning': search})
+            print(f"⏱️ Fit in {artifact['fit_seconds']:.3f}s, {artifact['n_iter']} solver iterations")
+            print("💾 Saved model artifact:", artifact['version'])
+        elif command == 'report':
+            try:
+                show_pairplot(args.data)
+            except Exception as e:
+                print("⚠️ Could not render pairplot:", e)
+        elif command == 'predict':
+            if args.profile:
+                get_artifact()  # profile the request, not the artifact load
+                with metrics.profile(args.profile) as profiler:
+                    result = predict_crop(args.temperature, args.humidity, args.ph, args.water_availability,
+                                          season_mapping[args.season])
+                print(profiler.report)
+            else:
+                result = predict_crop(args.temperature, args.humidity, args.ph, args.water_availability,
+                                      season_mapping[args.season])
+            print("🔎 Predicted Crop:", result)
+            if args.top_k > 1:
+                for rank, (crop, probability) in enumerate(
+                        recommend_crops(args.temperature, args.humidity, args.ph, args.water_availability,
+                                        args.season, args.top_k), 1):
+                    print(f"   {rank:>2}. {crop:<12} {probability:6.1%}")
+        elif command == 'score':
+            import scoring
+            stats = scoring.score_csv(args.input, args.output, args.chunksize, args.top_k, args.format,
+                                      workers=args.workers or os.cpu_count(),
+                                      progress=lambda rows: print(f"\r📄 Scored {rows:,} rows", end='',
+                                                                  file=sys.stderr))
+            print(file=sys.stderr)
+            print(f"✅ Scored {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+                  f"({stats['rows_per_sec']:,.0f} rows/sec) -> {args.output}")
+        elif command == 'plan':
+            import pandas as pd
+
+            import planner
+            fields = pd.read_csv(args.input)
+            start = time.perf_counter()
+            planned = planner.plan_frame(fields, seasons=args.seasons, no_repeats=not args.allow_repeats,
+                                         legume_rotation=not args.no_legume_rotation)
+            seconds = time.perf_counter() - start
+            planned.to_csv(args.output, index=False)
+            print(f"✅ Planned {len(fields):,} fields in {seconds:.2f}s "
+                  f"({len(fields) / seconds if seconds else 0:,.0f} fields/sec) -> {args.output}")
+        elif command == 'raster':
+            import raster
+            layers = {'temperature': args.temperature, 'humidity': args.humidity, 'ph': args.ph,
+                      'water availability': args.water_availability}
+            stats = raster.score_raster(layers, args.season, args.output, args.tile, args.workers or os.cpu_count(),
+                                        progress=lambda cells: print(f"\r🗺️ Scored {cells:,} cells", end='',
+                                                                     file=sys.stderr))
+            print(file=sys.stderr)
+            print(f"✅ Scored {stats['cells']:,} cells ({stats['valid_cells']:,} with data) in {stats['tiles']} tiles, "
+                  f"{stats['seconds']:.2f}s ({stats['cells_per_sec']:,.0f} cells/sec) -> {args.output}")
+        elif command == 'update':
+            import online_learning
+            artifact = online_learning.update(args.data, args.artifacts, args.epochs, verbose=True)
+            print("💾 Saved model artifact:", artifact['version'], "(from", artifact['parent_version'] + ")")
+        elif command == 'generate':
+            import synthetic
+            stats = synthetic.generate(args.output, args.rows, args.seed, args.chunk_rows,
+                                       args.workers or os.cpu_count(), args.format, synthetic.fit(args.data),
+                                       progress=lambda rows: print(f"\r🧪 Generated {rows:,} rows", end='',
+                                                                   file=sys.stderr))
+            print(file=sys.stderr)
+            print(f"✅ Wrote {stats['rows']:,} {stats['format']} rows in {stats['seconds']:.2f}s "
+                  f"({stats['rows_per_sec']:,.0f} rows/sec) -> {args.output}")
+        elif command == 'zoo':
+            import model_zoo
+            rows = model_zoo.compare(args.models, args.data, args.folds, args.jobs)
+            front = model_zoo.pareto_front(rows)
+            print(f"{'model':<20} {'CV accuracy':>14} {'fit s':>7} {'1-row µs':>9} {'batch rows/s':>13} {'KB':>8}")
+            for row in sorted(rows, key=lambda r: -r['cv_accuracy']):
+                marker = ' *' if row['model'] in front else ''
+                print(f"{row['model']:<20} {row['cv_accuracy']:>8.2%} ±{row['cv_accuracy_std']:>5.2%} "
+                      f"{row['fit_seconds']:>7.3f} {row['single_row_us']:>9.1f} "
+                      f"{row['batch_rows_per_sec']:>13,.0f} {row['model_kb']:>8.1f}{marker}")
+            print("* on the accuracy / single-row latency frontier")
+        elif command == 'grid':
+            import grid_engine
+            if args.report:
+                print(f"{'scale':>6} {'cells':>12} {'MB':>9} {'build s':>8} {'µs/row':>8} "
+                      f"{'agree(unif)':>12} {'agree(data)':>12} {'accuracy':>9}")
+                for row in grid_engine.resolution_report():
+                    print(f"{row['scale']:>6} {row['cells']:>12,} {row['megabytes']:>9.1f} "
+                          f"{row['build_seconds']:>8.1f} {row['lookup_us_per_row']:>8.3f} "
+                          f"{row['agreement_uniform']:>12.2%} {row['agreement_dataset']:>12.2%} "
+                          f"{row['accuracy_dataset']:>9.2%}")
+            else:
+                steps = {}
+                for item in args.step:
+                    feature, _, value = item.partition('=')
+                    steps[feature.replace('_', ' ')] = float(value)
+                artifact = get_artifact()
+                engine = grid_engine.GridEngine.build(artifact, steps, with_proba=args.with_proba,
+                                                      directory=grid_engine.default_directory(artifact))
+                path = engine.save()
+                print(f"💾 Saved {engine.classes.size:,}-cell grid ({engine.nbytes / 1e6:.1f} MB) to {path}")
+    except FileNotFoundError as e:
+        print(f"❌ File not found: {e}")
+        return 1
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        if args.metrics:
+            metrics.write(args.metrics)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Pre-encoded, memory-mappable binary copy of the crop dataset.
+
+Parsing the CSV and mapping ``label``/``season`` strings on every process
+start is wasted work: :func:`prepare` converts a CSV once into a directory of
+typed ``.npy`` columns (float32 measurements, int8 season and label codes)
+plus a ``meta.json`` recording the source file's SHA-256.  :func:`load`
+memory-maps the columns; the cache is rebuilt whenever the source hash
+changes (the hash is only recomputed when the file's size or mtime differ).
+
+The CSV is converted in chunks, so preparing a file larger than memory is
+fine.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+import crop_prediction
+import metrics
+import schema
+from model_store import dataset_hash
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".dataset_cache")
+NUMERIC = schema.NUMERIC_FEATURES
+COLUMNS = {'features': schema.MEASUREMENT_DTYPE, 'season': schema.CODE_DTYPE, 'label': schema.CODE_DTYPE}
+META_FILE = "meta.json"
+
+
+def cache_path(path, cache_dir=CACHE_DIR):
+    """Return the cache directory used for the source file ``path``."""
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(path))[0]}-{key}")
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _is_fresh(meta, path):
+    if meta is None:
+        return False
+    stat = os.stat(path)
+    if meta['source_size'] == stat.st_size and meta['source_mtime_ns'] == stat.st_mtime_ns:
+        return True
+    return meta['source_sha256'] == dataset_hash(path)
+
+
+def _to_npy(raw_path, npy_path, dtype, shape):
+    """Prefix the raw array in ``raw_path`` with an ``.npy`` header."""
+    with open(npy_path, 'wb') as out, open(raw_path, 'rb') as raw:
+        np.lib.format.write_array_header_1_0(out, {'descr': np.dtype(dtype).str, 'fortran_order': False,
+                                                   'shape': shape})
+        shutil.copyfileobj(raw, out, 1 << 20)
+    os.remove(raw_path)
+
+
+def prepare(path=crop_prediction.DATA_PATH, cache_dir=CACHE_DIR, chunksize=1_000_000):
+    """Build the binary cache for ``path`` unless an up-to-date one exists.
+
+    Returns the cache directory.  Raises ``ValueError`` for missing columns or
+    unknown labels/seasons, as :func:`crop_prediction.encode_dataset` does;
+    columns are parsed straight into the compact :mod:`schema` dtypes.
+    """
+    directory = cache_path(path, cache_dir)
+    meta = _read_meta(directory)
+    if _is_fresh(meta, path):
+        if meta['source_mtime_ns'] != os.stat(path).st_mtime_ns:
+            _write_meta(directory, meta, path)
+        return directory
+
+    with metrics.timer('dataset_prepare'):
+        _convert(path, directory, chunksize)
+    return directory
+
+
+def _convert(path, directory, chunksize):
+    """Parse the CSV at ``path`` in chunks into a fresh cache ``directory``."""
+    import pandas as pd
+
+    tmp_dir = directory + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    n_rows = 0
+    raw = {name: open(os.path.join(tmp_dir, name + ".raw"), 'wb') for name in COLUMNS}
+    try:
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype=schema.csv_dtypes()):
+            features, season, label = schema.encode_frame(chunk)
+            raw['features'].write(features.tobytes())
+            raw['season'].write(season.tobytes())
+            raw['label'].write(label.tobytes())
+            n_rows += len(chunk)
+    finally:
+        for f in raw.values():
+            f.close()
+    for name, dtype in COLUMNS.items():
+        shape = (n_rows, len(NUMERIC)) if name == 'features' else (n_rows,)
+        _to_npy(os.path.join(tmp_dir, name + ".raw"), os.path.join(tmp_dir, name + ".npy"), dtype, shape)
+
+    meta = {
+        'source': os.path.abspath(path),
+        'source_sha256': dataset_hash(path),
+        'n_rows': n_rows,
+        'numeric_features': NUMERIC,
+        'label_mapping': schema.label_mapping,
+        'season_mapping': schema.season_mapping,
+    }
+    _write_meta(tmp_dir, meta, path)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+def _write_meta(directory, meta, path):
+    stat = os.stat(path)
+    meta = dict(meta, source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns)
+    with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+
+def load(path=crop_prediction.DATA_PATH, cache_dir=CACHE_DIR, mmap_mode='r'):
+    """Return ``{'features', 'season', 'label', 'meta'}`` for ``path``.
+
+    ``features`` is an ``(n, 4)`` float32 array of the numeric columns in
+    :data:`NUMERIC` order; arrays are memory-mapped unless ``mmap_mode`` is
+    ``None``.  The cache is (re)built first if needed.  ``path`` may also be
+    a directory already in the cache layout (e.g. from :mod:`synthetic`).
+    """
+    directory = path if os.path.isdir(path) else prepare(path, cache_dir)
+    data = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode=mmap_mode) for name in COLUMNS}
+    data['meta'] = _read_meta(directory)
+    return data
+
+
+def load_frame(path=crop_prediction.DATA_PATH, cache_dir=CACHE_DIR):
+    """Return the cached dataset as a DataFrame shaped like the encoded CSV."""
+    import pandas as pd
+
+    data = load(path, cache_dir)
+    frame = pd.DataFrame(np.asarray(data['features']), columns=NUMERIC)
+    frame['season'] = np.asarray(data['season'])
+    frame['label'] = np.asarray(data['label'])
+    return frame
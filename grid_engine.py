@@ -0,0 +1,277 @@
+"""Precomputed decision grid for constant-time crop predictions.
+
+The inputs the app accepts are bounded (see :data:`DEFAULT_RANGES`), so the
+model's answer can be tabulated ahead of time.  :class:`GridEngine` evaluates
+the model once on a regular grid and stores the predicted class of every cell
+(and optionally its probabilities) in NumPy arrays that are saved next to the
+model artifact and memory-mapped on load.  Grids built for saving are
+written straight into those files, so they never have to fit in RAM.  A prediction is then the nearest
+grid cell; inputs outside the grid, or calls asking for ``exact=True``, fall
+back to the real model.
+
+Coarser grids use less memory but disagree with the model near decision
+boundaries; :func:`resolution_report` measures that trade-off.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+import crop_prediction
+from model_store import ARTIFACT_DIR
+
+# Slider bounds used by streamlit.py; seasons are taken from the artifact
+DEFAULT_RANGES = {
+    'temperature': (0.0, 50.0),
+    'humidity': (0.0, 100.0),
+    'ph': (0.0, 14.0),
+    'water availability': (0.0, 500.0),
+}
+DEFAULT_STEPS = {
+    'temperature': 1.0,
+    'humidity': 2.0,
+    'ph': 0.25,
+    'water availability': 10.0,
+}
+GRID_DIR = 'grid'
+CLASSES_FILE = 'classes.npy'
+PROBA_FILE = 'proba.npy'
+SPEC_FILE = 'spec.json'
+
+
+def default_directory(artifact):
+    """Return where the grid of ``artifact`` is saved: its version directory."""
+    return os.path.join(ARTIFACT_DIR, artifact['version'], GRID_DIR)
+
+
+def _npy_slices(path, dtype, shape):
+    """Create an ``.npy`` file of ``shape`` and return ``write(i, values)`` filling its ``i``-th slice.
+
+    Slices along the first axis are contiguous in the file; each is mapped
+    only while it is written, so resident memory stays at one slice.
+    """
+    offset = np.lib.format.open_memmap(path, 'w+', dtype, shape).offset
+    slice_bytes = int(np.prod(shape[1:])) * np.dtype(dtype).itemsize
+
+    def write(i, values):
+        out = np.memmap(path, dtype, 'r+', offset + i * slice_bytes, shape[1:])
+        out[...] = values
+        out.flush()
+        del out
+    return write
+
+
+class GridEngine:
+    """Nearest-cell lookup of the model's predictions on a regular grid."""
+
+    def __init__(self, artifact, spec, classes, proba=None):
+        self.artifact = artifact
+        self.spec = spec
+        self.classes = classes
+        self.proba = proba
+        self.names = crop_prediction.class_names(artifact)
+        self.numeric = [f for f in artifact['features'] if f != 'season']
+        self.lows = np.array([spec['ranges'][f][0] for f in self.numeric])
+        self.highs = np.array([spec['ranges'][f][1] for f in self.numeric])
+        self.steps = np.array([spec['steps'][f] for f in self.numeric])
+        self.seasons = np.array(spec['seasons'], dtype=float)
+        self.season_col = artifact['features'].index('season')
+        self.numeric_cols = [artifact['features'].index(f) for f in self.numeric]
+
+    @staticmethod
+    def axes(spec):
+        """Return the grid coordinates of every numeric feature, in feature order."""
+        axes = []
+        for feature, (low, high) in spec['ranges'].items():
+            step = spec['steps'][feature]
+            axes.append(low + step * np.arange(int(round((high - low) / step)) + 1))
+        return axes
+
+    @classmethod
+    def build(cls, artifact=None, steps=None, ranges=None, with_proba=False, directory=None):
+        """Evaluate the model on every grid cell, one temperature slice at a time.
+
+        With ``directory`` the arrays are written slice by slice into files
+        there and come back memory-mapped (complete the grid with
+        :meth:`save`); otherwise they are built in RAM.  A fine grid with
+        probabilities runs to gigabytes.
+        """
+        artifact = artifact or crop_prediction.get_artifact()
+        features = artifact['features']
+        numeric = [f for f in features if f != 'season']
+        spec = {
+            'version': artifact['version'],
+            'ranges': {f: list(dict(DEFAULT_RANGES, **(ranges or {}))[f]) for f in numeric},
+            'steps': {f: dict(DEFAULT_STEPS, **(steps or {}))[f] for f in numeric},
+            'seasons': sorted(artifact['season_mapping'].values()),
+            'with_proba': with_proba,
+        }
+        axes = cls.axes(spec)
+        shape = tuple(len(a) for a in axes) + (len(spec['seasons']),)
+        proba_shape = shape + (len(crop_prediction.class_names(artifact)),)
+        if directory is None:
+            classes = np.empty(shape, dtype=np.uint8)
+            proba = np.empty(proba_shape, dtype=np.float16) if with_proba else None
+            write_classes = classes.__setitem__
+            write_proba = proba.__setitem__ if with_proba else None
+        else:
+            os.makedirs(directory, exist_ok=True)
+            # A grid is only loadable once save() writes its spec
+            spec_path = os.path.join(directory, SPEC_FILE)
+            if os.path.exists(spec_path):
+                os.remove(spec_path)
+            write_classes = _npy_slices(os.path.join(directory, CLASSES_FILE), np.uint8, shape)
+            write_proba = (_npy_slices(os.path.join(directory, PROBA_FILE), np.float16, proba_shape)
+                           if with_proba else None)
+
+        # All cells sharing the first axis value, as rows in feature order
+        rest = np.meshgrid(*axes[1:], spec['seasons'], indexing='ij')
+        X = np.empty((rest[0].size, len(features)))
+        for axis, values in zip(numeric[1:] + ['season'], rest):
+            X[:, features.index(axis)] = values.ravel()
+        for i, value in enumerate(axes[0]):
+            X[:, features.index(numeric[0])] = value
+            p = crop_prediction._predict_proba(artifact, X)
+            write_classes(i, p.argmax(axis=1).reshape(shape[1:]))
+            if with_proba:
+                write_proba(i, p.reshape(proba_shape[1:]))
+        if directory is not None:
+            classes = np.load(os.path.join(directory, CLASSES_FILE), mmap_mode='r')
+            proba = np.load(os.path.join(directory, PROBA_FILE), mmap_mode='r') if with_proba else None
+        return cls(artifact, spec, classes, proba)
+
+    @property
+    def nbytes(self):
+        return self.classes.nbytes + (self.proba.nbytes if self.proba is not None else 0)
+
+    def save(self, directory=None):
+        """Save the grid under the artifact's version directory (by default).
+
+        Arrays already memory-mapped from their destination are left as they are.
+        """
+        directory = directory or default_directory(self.artifact)
+        os.makedirs(directory, exist_ok=True)
+        for name, array in ((CLASSES_FILE, self.classes), (PROBA_FILE, self.proba)):
+            if array is None:
+                continue
+            path = os.path.join(directory, name)
+            if not (isinstance(array, np.memmap) and os.path.abspath(array.filename) == os.path.abspath(path)):
+                np.save(path, array)
+        with open(os.path.join(directory, SPEC_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.spec, f, indent=2)
+        return directory
+
+    @classmethod
+    def load(cls, artifact=None, directory=None):
+        """Memory-map a saved grid; raises ``ValueError`` if it belongs to another model."""
+        artifact = artifact or crop_prediction.get_artifact()
+        directory = directory or default_directory(artifact)
+        with open(os.path.join(directory, SPEC_FILE), encoding='utf-8') as f:
+            spec = json.load(f)
+        if spec['version'] != artifact['version']:
+            raise ValueError(f"Grid was built for model {spec['version']}, not {artifact['version']}")
+        classes = np.load(os.path.join(directory, CLASSES_FILE), mmap_mode='r')
+        proba = np.load(os.path.join(directory, PROBA_FILE), mmap_mode='r') if spec['with_proba'] else None
+        return cls(artifact, spec, classes, proba)
+
+    def _cells(self, X):
+        """Return grid indices of the rows of ``X`` and a mask of rows on the grid."""
+        values = X[:, self.numeric_cols]
+        on_grid = ((values >= self.lows) & (values <= self.highs)).all(axis=1)
+        idx = np.rint((values - self.lows) / self.steps).astype(np.intp)
+        idx = np.minimum(np.maximum(idx, 0), np.array(self.classes.shape[:-1]) - 1)
+        season_idx = np.searchsorted(self.seasons, X[:, self.season_col])
+        return tuple(idx.T) + (season_idx,), on_grid
+
+    def predict_indices(self, X, exact=False):
+        """Return model class indices for the encoded rows of ``X``."""
+        if exact:
+            return crop_prediction._predict_proba(self.artifact, X).argmax(axis=1)
+        cells, on_grid = self._cells(X)
+        result = np.asarray(self.classes[cells], dtype=np.intp)
+        if not on_grid.all():
+            off = ~on_grid
+            result[off] = crop_prediction._predict_proba(self.artifact, X[off]).argmax(axis=1)
+        return result
+
+    def predict_proba(self, X, exact=False):
+        """Return class probabilities for the encoded rows of ``X``.
+
+        Requires a grid built with ``with_proba=True`` unless ``exact``.
+        """
+        if exact or self.proba is None:
+            if not exact:
+                raise ValueError("This grid was built without probabilities")
+            return crop_prediction._predict_proba(self.artifact, X)
+        cells, on_grid = self._cells(X)
+        result = np.asarray(self.proba[cells], dtype=np.float64)
+        if not on_grid.all():
+            off = ~on_grid
+            result[off] = crop_prediction._predict_proba(self.artifact, X[off])
+        return result
+
+    def predict_crops(self, batch, exact=False):
+        X = crop_prediction.to_feature_matrix(batch, self.artifact)
+        return self.names[self.predict_indices(X, exact)]
+
+    def predict_crop(self, temperature, humidity, ph, water_availability, season, exact=False):
+        """Single-row lookup computed with plain Python arithmetic.
+
+        Falls back to :meth:`predict_crops` (and the model) when ``exact`` or
+        when the input is off the grid.
+        """
+        row = [temperature, humidity, ph, water_availability, season]
+        if not exact:
+            season_code = self.artifact['season_mapping'].get(season, season)
+            values = [row[i] for i in self.numeric_cols]
+            if (season_code in self.spec['seasons']
+                    and all(lo <= v <= hi for v, lo, hi in zip(values, self.lows, self.highs))):
+                cell = tuple(int(round((v - lo) / step)) for v, lo, step in zip(values, self.lows, self.steps))
+                return self.names[self.classes[cell + (self.spec['seasons'].index(season_code),)]]
+        return self.predict_crops([row], exact)[0]
+
+
+def resolution_report(artifact=None, scales=(8, 4, 2, 1), n_samples=100_000, seed=0):
+    """Compare grids at several resolutions against the exact model.
+
+    Each scale multiplies :data:`DEFAULT_STEPS`.  For every grid, reports its
+    size, build time, per-row lookup time and agreement with the model on
+    uniformly random in-range inputs and on the bundled dataset.
+    """
+    artifact = artifact or crop_prediction.get_artifact()
+    rng = np.random.default_rng(seed)
+    features = artifact['features']
+    uniform = np.empty((n_samples, len(features)))
+    for i, feature in enumerate(features):
+        if feature == 'season':
+            uniform[:, i] = rng.choice(sorted(artifact['season_mapping'].values()), n_samples)
+        else:
+            uniform[:, i] = rng.uniform(*DEFAULT_RANGES[feature], n_samples)
+    dataset = crop_prediction.load_dataset()
+    observed = dataset[features].to_numpy(dtype=float)
+    exact_uniform = crop_prediction._predict_proba(artifact, uniform).argmax(axis=1)
+    exact_observed = crop_prediction._predict_proba(artifact, observed).argmax(axis=1)
+    labels = np.searchsorted(crop_prediction._classes(artifact), dataset['label'].to_numpy())
+
+    rows = []
+    for scale in scales:
+        steps = {f: step * scale for f, step in DEFAULT_STEPS.items()}
+        start = time.perf_counter()
+        engine = GridEngine.build(artifact, steps)
+        build_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        grid_uniform = engine.predict_indices(uniform)
+        lookup_us = (time.perf_counter() - start) / n_samples * 1e6
+        grid_observed = engine.predict_indices(observed)
+        rows.append({
+            'scale': scale,
+            'cells': int(engine.classes.size),
+            'megabytes': engine.nbytes / 1e6,
+            'build_seconds': build_seconds,
+            'lookup_us_per_row': lookup_us,
+            'agreement_uniform': float((grid_uniform == exact_uniform).mean()),
+            'agreement_dataset': float((grid_observed == exact_observed).mean()),
+            'accuracy_dataset': float((grid_observed == labels).mean()),
+        })
+    return rows
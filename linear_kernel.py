@@ -0,0 +1,148 @@
+"""Pure-NumPy inference for linear (multinomial logistic) models.
+
+For one-row calls most of the time in ``LogisticRegression.predict`` goes to
+scikit-learn's input validation, not to the 5x13 matrix product.
+:class:`LinearKernel` holds the coefficients, intercepts and class codes
+extracted from a fitted model and repeats exactly the arithmetic scikit-learn
+performs (``X @ coef.T + intercept``, then a max-shifted softmax), so its
+results match the estimator bit for bit.  Single-row calls reuse
+per-thread preallocated buffers.
+
+Models that standardize their inputs first (a ``StandardScaler`` ->
+linear-model pipeline) are supported too: the scaler's ``mean``/``scale``
+are exported with the weights and applied with the same arithmetic as
+``StandardScaler.transform``, which keeps the results exact.
+
+The weights are exported into the model artifact as ``weights.npz`` at
+training time, after :func:`verify` has checked them against the estimator.
+"""
+import threading
+
+import numpy as np
+
+
+def extract_weights(model):
+    """Return ``{'coef', 'intercept', 'classes'}`` for a multinomial linear model.
+
+    For a ``StandardScaler`` -> linear model pipeline the scaler's ``mean``
+    and ``scale`` are included.  Returns ``None`` if ``model`` is not a
+    fitted multi-class linear model (or such a pipeline).
+    """
+    steps = getattr(model, 'steps', None)
+    if steps is not None:
+        from sklearn.preprocessing import StandardScaler
+
+        if len(steps) != 2 or not isinstance(steps[0][1], StandardScaler):
+            return None
+        scaler = steps[0][1]
+        weights = extract_weights(steps[1][1])
+        if weights is not None:
+            n_features = weights['coef'].shape[1]
+            weights['mean'] = np.array(scaler.mean_, dtype=np.float64) if scaler.with_mean else np.zeros(n_features)
+            weights['scale'] = np.array(scaler.scale_, dtype=np.float64) if scaler.with_std else np.ones(n_features)
+        return weights
+
+    coef = getattr(model, 'coef_', None)
+    intercept = getattr(model, 'intercept_', None)
+    classes = getattr(model, 'classes_', None)
+    if coef is None or intercept is None or classes is None or coef.shape[0] != len(classes):
+        return None
+    return {
+        'coef': np.array(coef, dtype=np.float64),
+        'intercept': np.array(intercept, dtype=np.float64),
+        'classes': np.array(classes),
+    }
+
+
+class LinearKernel:
+    """Softmax/argmax over ``X @ coef.T + intercept`` with plain NumPy."""
+
+    def __init__(self, coef, intercept, classes, season_mapping=None, season_col=None, mean=None, scale=None):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+        self.intercept = np.ascontiguousarray(intercept, dtype=np.float64)
+        self.classes = np.asarray(classes)
+        self.season_mapping = season_mapping or {}
+        self.season_codes = set(self.season_mapping.values())
+        self.season_col = season_col
+        self._local = threading.local()
+
+    @classmethod
+    def from_weights(cls, weights, artifact=None):
+        kwargs = {}
+        if artifact is not None:
+            kwargs = {'season_mapping': artifact['season_mapping'],
+                      'season_col': artifact['features'].index('season')}
+        return cls(weights['coef'], weights['intercept'], weights['classes'], mean=weights.get('mean'),
+                   scale=weights.get('scale'), **kwargs)
+
+    def decision_function(self, X):
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        return np.dot(X, self.coef.T) + self.intercept
+
+    def predict_proba(self, X, temperature=1.0):
+        """Softmax of the scores; ``temperature`` divides them first (see :mod:`calibration`)."""
+        scores = self.decision_function(X)
+        if temperature != 1.0:
+            scores /= temperature
+        scores -= scores.max(axis=1).reshape((-1, 1))
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1).reshape((-1, 1))
+        return scores
+
+    def predict_indices(self, X):
+        """Return the index (into ``classes``) of the winning class per row."""
+        return self.decision_function(X).argmax(axis=1)
+
+    def predict(self, X):
+        return self.classes[self.predict_indices(X)]
+
+    def _buffers(self):
+        local = self._local
+        if not hasattr(local, 'x'):
+            local.x = np.empty((1, self.coef.shape[1]))
+            local.scores = np.empty((1, self.coef.shape[0]))
+        return local.x, local.scores
+
+    def _row_scores(self, row):
+        x, scores = self._buffers()
+        if self.season_col is not None:
+            season = row[self.season_col]
+            code = self.season_mapping.get(season, season)
+            if code not in self.season_codes:
+                raise ValueError(f"Unknown season values: [{season!r}]")
+            row = list(row)
+            row[self.season_col] = code
+        x[0] = row
+        if not np.isfinite(x).all():
+            raise ValueError("Features must be finite numbers")
+        if self.mean is not None:
+            x -= self.mean
+            x /= self.scale
+        np.dot(x, self.coef.T, out=scores)
+        scores += self.intercept
+        return scores
+
+    def predict_row(self, row):
+        """Return the class code for one row of raw feature values.
+
+        Season names are encoded via ``season_mapping``; raises ``ValueError``
+        for unknown seasons or non-finite values.
+        """
+        return self.classes[self._row_scores(row).argmax()]
+
+    def predict_proba_row(self, row, temperature=1.0):
+        """Return the class probabilities for one row as a new 1-D array."""
+        scores = self._row_scores(row)[0]
+        proba = np.exp((scores - scores.max()) / temperature)
+        proba /= proba.sum()
+        return proba
+
+
+def verify(model, weights, X):
+    """Return True if the kernel reproduces ``model`` exactly on ``X``."""
+    kernel = LinearKernel.from_weights(weights)
+    return (np.array_equal(kernel.predict(X), model.predict(X))
+            and np.array_equal(kernel.predict_proba(X), model.predict_proba(X)))
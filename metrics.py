@@ -0,0 +1,221 @@
+"""Lightweight timers, counters and latency histograms for the hot paths.
+
+Instrumentation is off by default and then costs one flag check per call.
+Turn it on with :func:`enable` (or ``CROP_METRICS=1`` in the environment)
+and every :func:`timer` block / :func:`timed` function records its latency
+into a histogram (whose count is the number of calls); :func:`increment`
+feeds plain counters.  Gauges (such as the drift statistics of
+:mod:`monitoring`) come from collectors registered with
+:func:`add_collector`, which are only evaluated on export.  Export the
+registry with
+:func:`prometheus_text` (Prometheus text exposition format) or
+:func:`write` (``.json`` or ``.prom``).
+
+:func:`profile` captures a single request with ``cProfile`` (``'cpu'``) or
+``tracemalloc`` (``'memory'``) and returns a printable report.
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+PREFIX = 'crop_'
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+_enabled = os.environ.get('CROP_METRICS', '') not in ('', '0')
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_collectors = []
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def increment(name, value=1):
+    """Add ``value`` to the counter ``name`` (no-op while disabled)."""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, seconds):
+    """Record one ``seconds`` sample in the latency histogram ``name``."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {'buckets': [0] * (len(BUCKETS) + 1), 'sum': 0.0, 'count': 0}
+        histogram['buckets'][bisect.bisect_left(BUCKETS, seconds)] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name):
+    """Context manager timing its block into the histogram ``name``."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name):
+    """Decorator timing every call of the function into the histogram ``name``."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def add_collector(fn):
+    """Register ``fn``, called on every export to return ``{name: value}`` gauges.
+
+    Names may carry Prometheus labels, e.g. ``'drift_psi{feature="ph"}'``.
+    """
+    if fn not in _collectors:
+        _collectors.append(fn)
+
+
+def snapshot():
+    """Return the counters, histograms and gauges as a JSON-serializable dict."""
+    gauges = {}
+    for collect in list(_collectors):
+        gauges.update(collect())
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'histograms': {name: {
+                'buckets': dict(zip([str(b) for b in BUCKETS] + ['+Inf'], h['buckets'])),
+                'sum': h['sum'],
+                'count': h['count'],
+            } for name, h in _histograms.items()},
+            'gauges': gauges,
+        }
+
+
+def prometheus_text():
+    """Return the registry in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = []
+    for name, value in sorted(data['counters'].items()):
+        metric = f"{PREFIX}{name}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    for name, histogram in sorted(data['histograms'].items()):
+        metric = f"{PREFIX}{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in histogram['buckets'].items():
+            cumulative += count
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+        lines += [f"{metric}_sum {histogram['sum']!r}", f"{metric}_count {histogram['count']}"]
+    declared = set()
+    for name, value in sorted(data['gauges'].items()):
+        metric = PREFIX + name.partition('{')[0]
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f"# TYPE {metric} gauge")
+        value = float(value)
+        lines.append(f"{PREFIX}{name} {'NaN' if value != value else repr(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    """Write the registry to ``path``: JSON for ``*.json``, Prometheus text otherwise."""
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            json.dump(snapshot(), f, indent=2)
+        else:
+            f.write(prometheus_text())
+
+
+class profile:
+    """Capture one block with ``cProfile`` (``mode='cpu'``) or ``tracemalloc`` (``'memory'``).
+
+    After the block, :attr:`report` holds the top ``limit`` entries as text;
+    a ``.prof`` file is also written to ``path`` in CPU mode if given.
+    """
+
+    def __init__(self, mode='cpu', limit=20, path=None):
+        if mode not in ('cpu', 'memory'):
+            raise ValueError(f"Unknown profile mode {mode!r}; choose 'cpu' or 'memory'")
+        self.mode = mode
+        self.limit = limit
+        self.path = path
+        self.report = None
+
+    def __enter__(self):
+        if self.mode == 'cpu':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            import tracemalloc
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.mode == 'cpu':
+            self._profiler.disable()
+            import io
+            import pstats
+            if self.path:
+                self._profiler.dump_stats(self.path)
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(self.limit)
+            self.report = out.getvalue()
+        else:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            allocations = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            top = allocations.statistics('lineno')[:self.limit]
+            self.report = "\n".join([f"current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB"]
+                                    + [str(stat) for stat in top])
+        return False
@@ -0,0 +1,133 @@
+"""Process-wide registry of the serving artifact, with hot reload.
+
+A :class:`ModelRegistry` holds exactly one loaded artifact that every thread
+(every Streamlit session, every server request) shares.  The artifact is
+fully warmed before it is published — estimator unpickled, NumPy kernel and
+label lookup built — and then frozen in a read-only mapping, so readers never
+mutate it and need no lock: :meth:`ModelRegistry.current` is a single
+attribute read.
+
+:meth:`ModelRegistry.start` watches ``artifacts/LATEST`` from a daemon
+thread.  When it names a new version the artifact is loaded and warmed in
+the background and swapped in with one reference assignment; predictions
+already running finish on the artifact they started with.  A version that
+fails to load is reported in :meth:`ModelRegistry.stats` and the current
+artifact stays in service.
+"""
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import crop_prediction
+from model_store import ARTIFACT_DIR, LATEST_FILE, latest_version, load_artifact
+
+
+def warm(artifact):
+    """Build everything the prediction path would otherwise create lazily, then freeze ``artifact``."""
+    artifact['model']  # unpickle now rather than on the first request
+    crop_prediction._kernel(artifact)
+    crop_prediction._crop_lookup(artifact)
+    return MappingProxyType(artifact)
+
+
+class ModelRegistry:
+    """Thread-safe holder of the current artifact of ``directory``.
+
+    ``interval`` is the polling period of the watcher in seconds.  ``load``
+    is called with ``(version, directory)`` and defaults to
+    :func:`model_store.load_artifact`.
+    """
+
+    def __init__(self, directory=ARTIFACT_DIR, interval=1.0, load=load_artifact):
+        self.directory = directory
+        self.interval = interval
+        self._load = load
+        self._artifact = None
+        self._lock = threading.Lock()  # serializes loads; never taken by readers
+        self._stop = threading.Event()
+        self._thread = None
+        self._stamp = None
+        self.swaps = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_load_seconds = None
+        self.last_swap_seconds = None
+
+    def current(self):
+        """Return the current (read-only) artifact, loading one on first use."""
+        artifact = self._artifact
+        if artifact is None:
+            self.refresh()
+            artifact = self._artifact
+        return artifact
+
+    def _latest_stamp(self):
+        try:
+            stat = os.stat(os.path.join(self.directory, LATEST_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def refresh(self):
+        """Swap to the version named by ``LATEST`` if it changed; returns ``True`` on a swap.
+
+        With nothing loaded yet this goes through :func:`crop_prediction.load_model`,
+        which trains a first artifact if there is none.
+        """
+        with self._lock:
+            self._stamp = self._latest_stamp()
+            version = latest_version(self.directory)
+            if self._artifact is not None and version == self._artifact['version']:
+                return False
+            start = time.perf_counter()
+            try:
+                if self._artifact is None and version is None:
+                    artifact = crop_prediction.load_model(directory=self.directory)
+                else:
+                    artifact = self._load(version, self.directory)
+                artifact = warm(artifact)
+            except Exception as e:
+                if self._artifact is None:
+                    raise
+                self.failures += 1
+                self.last_error = f"{version}: {e!r}"
+                return False
+            loaded = time.perf_counter()
+            self._artifact = artifact
+            self.last_swap_seconds = time.perf_counter() - loaded
+            self.last_load_seconds = loaded - start
+            self.swaps += 1
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if self._latest_stamp() != self._stamp:
+                self.refresh()
+
+    def start(self):
+        """Load the current artifact and start watching the directory; returns ``self``."""
+        self.current()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='model-registry', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        artifact = self._artifact
+        return {
+            'version': artifact and artifact['version'],
+            'swaps': self.swaps,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_load_seconds': self.last_load_seconds,
+            'last_swap_seconds': self.last_swap_seconds,
+            'watching': self._thread is not None,
+        }
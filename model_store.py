@@ -0,0 +1,121 @@
+"""Versioned model artifacts for the crop recommendation model.
+
+Each training run writes a directory ``artifacts/<version>/`` holding the
+fitted estimator (``model.joblib``), a ``metadata.json`` describing how it
+was trained and, for linear models, the raw ``weights.npz`` used by
+:mod:`linear_kernel`.  ``artifacts/LATEST`` names the version that loaders
+pick up by default, so the Streamlit app and the CLI never have to refit on
+start-up.
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+LATEST_FILE = "LATEST"
+MODEL_FILE = "model.joblib"
+METADATA_FILE = "metadata.json"
+WEIGHTS_FILE = "weights.npz"
+
+
+def dataset_hash(path):
+    """Return the SHA-256 hex digest of the file at ``path``."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def save_artifact(model, metadata, directory=ARTIFACT_DIR, weights=None):
+    """Persist ``model`` and ``metadata`` as a new version and mark it latest.
+
+    ``metadata`` must be JSON serialisable; ``weights`` is an optional dict of
+    NumPy arrays stored alongside the estimator.  The version string sorts
+    chronologically and embeds a prefix of ``metadata['dataset_sha256']`` when
+    present.  Returns the new version string.
+    """
+    version = time.strftime("%Y%m%dT%H%M%S")
+    if metadata.get("dataset_sha256"):
+        version += "-" + metadata["dataset_sha256"][:8]
+    version_dir = os.path.join(directory, version)
+    suffix = 1
+    while os.path.exists(version_dir):
+        suffix += 1
+        version_dir = os.path.join(directory, f"{version}.{suffix}")
+    version = os.path.basename(version_dir)
+    os.makedirs(version_dir)
+
+    metadata = dict(metadata, version=version, created=time.time())
+    import joblib
+
+    joblib.dump(model, os.path.join(version_dir, MODEL_FILE))
+    if weights is not None:
+        np.savez(os.path.join(version_dir, WEIGHTS_FILE), **weights)
+    _write_atomic(os.path.join(version_dir, METADATA_FILE), json.dumps(metadata, indent=2))
+    _write_atomic(os.path.join(directory, LATEST_FILE), version)
+    return version
+
+
+class Artifact(dict):
+    """Artifact dict whose ``'model'`` entry is unpickled on first access.
+
+    Callers that only need the metadata and weights (such as the NumPy
+    prediction path) never pay for importing joblib and scikit-learn.
+    """
+
+    def __init__(self, metadata, model_path, mmap_mode):
+        super().__init__(metadata)
+        self.model_path = model_path
+        self.mmap_mode = mmap_mode
+
+    def __missing__(self, key):
+        if key != "model":
+            raise KeyError(key)
+        import joblib
+
+        self["model"] = joblib.load(self.model_path, mmap_mode=self.mmap_mode)
+        return self["model"]
+
+
+def latest_version(directory=ARTIFACT_DIR):
+    """Return the version named by ``LATEST`` or ``None`` if nothing is saved."""
+    try:
+        with open(os.path.join(directory, LATEST_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_artifact(version=None, directory=ARTIFACT_DIR, mmap_mode="r"):
+    """Load an artifact as a dict of its metadata plus the fitted ``model``.
+
+    Loads the latest version unless ``version`` is given.  The estimator is
+    only unpickled when ``artifact['model']`` is first used, and its NumPy
+    arrays are memory-mapped (``mmap_mode``) rather than copied, which keeps
+    loading fast and lets processes share the pages.  Saved weights, if
+    any, are returned under ``'weights'``.  Raises ``FileNotFoundError`` if no
+    artifact exists.
+    """
+    if version is None:
+        version = latest_version(directory)
+        if version is None:
+            raise FileNotFoundError(f"No model artifact found in {directory!r}")
+    version_dir = os.path.join(directory, version)
+    with open(os.path.join(version_dir, METADATA_FILE), encoding="utf-8") as f:
+        artifact = Artifact(json.load(f), os.path.join(version_dir, MODEL_FILE), mmap_mode)
+    weights_path = os.path.join(version_dir, WEIGHTS_FILE)
+    if os.path.exists(weights_path):
+        with np.load(weights_path) as weights:
+            artifact["weights"] = dict(weights)
+    return artifact
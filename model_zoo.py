@@ -0,0 +1,170 @@
+"""Candidate estimators and an accuracy/latency comparison benchmark.
+
+:data:`MODELS` names the estimators the project can train.  :func:`compare`
+runs k-fold cross-validation for all of them, with every (model, fold) fit
+dispatched in parallel across cores, then refits each model once to measure
+what matters for serving: single-row latency, batch throughput and the
+size of the pickled model.  Latency and throughput are timed through
+:func:`crop_prediction.predict_crop`/:func:`crop_prediction.predict_crops`
+with an in-memory artifact, so linear models use the NumPy kernel exactly as
+they would in production.  :func:`pareto_front` picks the models that no
+other model beats on both accuracy and single-row latency.
+"""
+import pickle
+import time
+
+import numpy as np
+
+import crop_prediction
+import linear_kernel
+
+
+def _logistic_regression(C=1.0, solver='lbfgs', scaling='none', max_iter=200):
+    from sklearn.linear_model import LogisticRegression
+    model = LogisticRegression(C=C, solver=solver, max_iter=max_iter)
+    if scaling == 'standard':
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        return make_pipeline(StandardScaler(), model)
+    if scaling != 'none':
+        raise ValueError(f"Unknown scaling {scaling!r}; choose 'none' or 'standard'")
+    return model
+
+
+def _random_forest():
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=200, random_state=42)
+
+
+def _gradient_boosting():
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    return HistGradientBoostingClassifier(random_state=42)
+
+
+def _knn():
+    from sklearn.neighbors import KNeighborsClassifier
+    return KNeighborsClassifier(n_neighbors=5)
+
+
+def _naive_bayes():
+    from sklearn.naive_bayes import GaussianNB
+    return GaussianNB()
+
+
+def _online_sgd():
+    from online_learning import OnlineCropModel
+    return OnlineCropModel()
+
+
+MODELS = {
+    'logistic_regression': _logistic_regression,
+    'random_forest': _random_forest,
+    'gradient_boosting': _gradient_boosting,
+    'knn': _knn,
+    'naive_bayes': _naive_bayes,
+    'online_sgd': _online_sgd,
+}
+
+
+def make_model(name, **params):
+    """Return a new, unfitted estimator registered under ``name``.
+
+    ``params`` are passed to the factory (e.g. ``C``/``solver``/``scaling``
+    for ``logistic_regression``, see :mod:`tuning`).
+    """
+    try:
+        factory = MODELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown model {name!r}; choose from {sorted(MODELS)}") from None
+    return factory(**params)
+
+
+def _fit_fold(name, X, y, train_idx, test_idx):
+    model = make_model(name)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    return name, fit_seconds, float((model.predict(X[test_idx]) == y[test_idx]).mean())
+
+
+def _serving_artifact(name, model, X):
+    """Return an in-memory artifact for ``model``, with kernel weights as :func:`crop_prediction.train` saves them."""
+    artifact = {
+        'version': f'zoo-{name}',
+        'label_mapping': crop_prediction.label_mapping,
+        'season_mapping': crop_prediction.season_mapping,
+        'features': crop_prediction.FEATURES,
+        'model': model,
+    }
+    weights = linear_kernel.extract_weights(model)
+    if weights is not None and linear_kernel.verify(model, weights, X):
+        artifact['weights'] = weights
+    return artifact
+
+
+def _single_row_latency_us(artifact, X, calls):
+    timings = np.empty(calls)
+    for i in range(calls):
+        row = X[i % len(X)].tolist()
+        start = time.perf_counter()
+        crop_prediction.predict_crop(*row, artifact=artifact)
+        timings[i] = time.perf_counter() - start
+    return float(np.median(timings) * 1e6)
+
+
+def compare(names=None, path=crop_prediction.DATA_PATH, folds=5, n_jobs=-1, latency_calls=500,
+            batch_rows=100_000, seed=42):
+    """Cross-validate and benchmark the models in ``names`` (default: all).
+
+    Returns one dict per model with mean/std CV accuracy, mean fit time,
+    median single-row latency, batch throughput and pickled size.
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import StratifiedKFold
+
+    names = list(names or MODELS)
+    for name in names:
+        make_model(name)
+    dataset = crop_prediction.load_dataset(path)
+    X = dataset[crop_prediction.FEATURES].to_numpy(dtype=float)
+    y = dataset['label'].to_numpy()
+    splits = list(StratifiedKFold(folds, shuffle=True, random_state=seed).split(X, y))
+
+    fold_results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(name, X, y, train_idx, test_idx)
+        for name in names for train_idx, test_idx in splits)
+
+    batch = X[np.random.default_rng(seed).integers(0, len(X), batch_rows)]
+    rows = []
+    for name in names:
+        scores = [acc for n, _, acc in fold_results if n == name]
+        fit_times = [t for n, t, _ in fold_results if n == name]
+        model = make_model(name).fit(X, y)
+        artifact = _serving_artifact(name, model, X)
+        crop_prediction.predict_crops(X[:1], artifact)  # warm-up: builds the kernel and lookups
+        start = time.perf_counter()
+        crop_prediction.predict_crops(batch, artifact)
+        batch_seconds = time.perf_counter() - start
+        rows.append({
+            'model': name,
+            'cv_accuracy': float(np.mean(scores)),
+            'cv_accuracy_std': float(np.std(scores)),
+            'fit_seconds': float(np.mean(fit_times)),
+            'single_row_us': _single_row_latency_us(artifact, X, latency_calls),
+            'batch_rows_per_sec': batch_rows / batch_seconds,
+            'model_kb': len(pickle.dumps(model)) / 1024,
+        })
+    return rows
+
+
+def pareto_front(rows):
+    """Return the names of models not dominated on (accuracy, single-row latency)."""
+    front = []
+    for row in rows:
+        dominated = any(
+            other['cv_accuracy'] >= row['cv_accuracy'] and other['single_row_us'] <= row['single_row_us']
+            and (other['cv_accuracy'] > row['cv_accuracy'] or other['single_row_us'] < row['single_row_us'])
+            for other in rows)
+        if not dominated:
+            front.append(row['model'])
+    return front
@@ -0,0 +1,274 @@
+"""Input validation and drift monitoring on the serving path.
+
+Training stores per-feature statistics of the training split in the
+artifact (``metadata['feature_stats']``, see :func:`training_stats`): the
+range, mean and standard deviation of every measurement, decile bin edges
+with the share of training rows in each bin, the season mix and the label
+mix.  From those:
+
+* :func:`out_of_range` flags inputs outside the range seen in training;
+* :class:`DriftMonitor` keeps fixed-size bin counts of the served inputs and
+  predictions and computes the population stability index (PSI) of each
+  against training.  Memory is constant per feature.
+
+Monitoring runs while :mod:`metrics` is enabled.  The prediction functions
+hand their rows to :func:`record_row`/:func:`record`.  Single rows are only
+appended to a bounded buffer that is folded into the bin counts one
+vectorized batch at a time, so a ``predict_crop`` call pays for two list
+appends, not a histogram update.  The statistics are exported as :mod:`metrics` gauges
+(``crop_drift_psi{feature=...}``, ``crop_out_of_range_rows`` ...).
+"""
+import threading
+
+import numpy as np
+
+import metrics
+
+N_BINS = 10
+BUFFER_ROWS = 4096
+# Floor for empty bins, which would make the PSI infinite
+PSI_EPSILON = 1e-4
+# Usual reading of the PSI: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 major shift
+PSI_WARNING = 0.1
+PSI_ALERT = 0.25
+
+
+def _binned_shares(values, edges):
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1) / len(values)
+
+
+def training_stats(X, labels, features):
+    """Return the JSON-serializable statistics the monitor compares served traffic with.
+
+    ``X`` holds the training rows in ``features`` order (``season`` as
+    codes) and ``labels`` their label codes.
+    """
+    numeric = {}
+    for i, feature in enumerate(features):
+        if feature == 'season':
+            continue
+        values = np.asarray(X[:, i], dtype=float)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, N_BINS + 1)[1:-1]))
+        numeric[feature] = {
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'mean': float(values.mean()),
+            'std': float(values.std()),
+            'edges': edges.tolist(),
+            'reference': _binned_shares(values, edges).tolist(),
+        }
+    seasons = np.asarray(X[:, features.index('season')]).astype(int)
+    labels = np.asarray(labels).astype(int)
+    return {
+        'n_rows': len(X),
+        'numeric': numeric,
+        'season': (np.bincount(seasons) / len(seasons)).tolist(),
+        'label': (np.bincount(labels) / len(labels)).tolist(),
+    }
+
+
+def update_stats(stats, X, labels, features):
+    """Return ``stats`` (from :func:`training_stats`) extended with more training rows.
+
+    Bin edges stay fixed, so the reference shares remain comparable with
+    counts already collected against them.
+    """
+    n_old, n_new = stats['n_rows'], len(X)
+    total = n_old + n_new
+    if not n_new:
+        return stats
+    numeric = {}
+    for i, feature in enumerate(features):
+        old = stats['numeric'].get(feature)
+        if old is None:
+            continue
+        values = np.asarray(X[:, i], dtype=float)
+        mean = (n_old * old['mean'] + values.sum()) / total
+        # Pooled variance: each part's spread plus its mean's distance from the new mean
+        variance = (n_old * (old['std'] ** 2 + (old['mean'] - mean) ** 2)
+                    + ((values - mean) ** 2).sum()) / total
+        shares = _binned_shares(values, np.asarray(old['edges']))
+        numeric[feature] = dict(
+            old,
+            min=min(old['min'], float(values.min())),
+            max=max(old['max'], float(values.max())),
+            mean=float(mean),
+            std=float(np.sqrt(variance)),
+            reference=((n_old * np.asarray(old['reference']) + n_new * shares) / total).tolist(),
+        )
+
+    def merged(shares, codes):
+        counts = np.bincount(np.asarray(codes).astype(int), minlength=len(shares))
+        padded = np.zeros(len(counts))
+        padded[:len(shares)] = shares
+        return ((n_old * padded + counts) / total).tolist()
+
+    return {
+        'n_rows': total,
+        'numeric': numeric,
+        'season': merged(stats['season'], X[:, features.index('season')]),
+        'label': merged(stats['label'], labels),
+    }
+
+
+def out_of_range(X, stats, features):
+    """Return ``{feature: bool mask}`` of the rows of ``X`` outside the training range."""
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    flags = {}
+    for i, feature in enumerate(features):
+        feature_stats = stats['numeric'].get(feature)
+        if feature_stats is not None:
+            flags[feature] = (X[:, i] < feature_stats['min']) | (X[:, i] > feature_stats['max'])
+    return flags
+
+
+def out_of_range_features(row, stats, features):
+    """Return the features of one input row outside the training range, with that range."""
+    return {feature: (stats['numeric'][feature]['min'], stats['numeric'][feature]['max'])
+            for feature, flag in out_of_range([row], stats, features).items() if flag[0]}
+
+
+def psi(observed, reference):
+    """Population stability index between two distributions over the same bins."""
+    observed = np.asarray(observed, dtype=float)
+    total = observed.sum()
+    if not total:
+        return float('nan')
+    p = np.maximum(observed / total, PSI_EPSILON)
+    q = np.maximum(np.asarray(reference, dtype=float), PSI_EPSILON)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+class DriftMonitor:
+    """Streaming bin counts of served inputs and predictions for one artifact.
+
+    Thread-safe.  Single rows are buffered and folded into the counts every
+    ``buffer_rows`` rows (and on :meth:`flush`/:meth:`report`).
+    """
+
+    def __init__(self, stats, features, season_mapping, buffer_rows=BUFFER_ROWS):
+        self.stats = stats
+        self.features = list(features)
+        self.season_mapping = season_mapping
+        self.numeric = [(i, f, np.asarray(stats['numeric'][f]['edges'])) for i, f in enumerate(self.features)
+                        if f in stats['numeric']]
+        self.season_col = self.features.index('season')
+        self.counts = {f: np.zeros(len(edges) + 1, dtype=np.int64) for _, f, edges in self.numeric}
+        self.season_counts = np.zeros(len(stats['season']), dtype=np.int64)
+        self.label_counts = np.zeros(len(stats['label']), dtype=np.int64)
+        self.out_of_range = {f: 0 for _, f, _ in self.numeric}
+        self.out_of_range_rows = 0
+        self.rows = 0
+        self.buffer_rows = buffer_rows
+        self._rows = []
+        self._labels = []
+        self._lock = threading.Lock()
+
+    def record_row(self, row, label):
+        # Appending to lists is the cheapest thing a single-row call can do;
+        # conversion and binning happen once per buffer_rows rows
+        with self._lock:
+            self._rows.append(row)
+            self._labels.append(label)
+            if len(self._rows) >= self.buffer_rows:
+                self._fold_buffer()
+
+    def record(self, X, labels):
+        with self._lock:
+            self._fold_buffer()
+            self._fold(X, np.asarray(labels))
+
+    def flush(self):
+        with self._lock:
+            self._fold_buffer()
+
+    def _fold_buffer(self):
+        if not self._rows:
+            return
+        rows = self._rows
+        if any(isinstance(row[self.season_col], str) for row in rows):
+            rows = [list(row) for row in rows]
+            for row in rows:
+                row[self.season_col] = self.season_mapping.get(row[self.season_col], row[self.season_col])
+        self._fold(np.array(rows, dtype=float), np.array(self._labels, dtype=np.int64))
+        self._rows, self._labels = [], []
+
+    def _fold(self, X, labels):
+        outside = np.zeros(len(X), dtype=bool)
+        for i, feature, edges in self.numeric:
+            values = X[:, i]
+            self.counts[feature] += np.bincount(np.searchsorted(edges, values, side='right'),
+                                                minlength=len(edges) + 1)
+            numeric_stats = self.stats['numeric'][feature]
+            flagged = (values < numeric_stats['min']) | (values > numeric_stats['max'])
+            self.out_of_range[feature] += int(flagged.sum())
+            outside |= flagged
+        self.out_of_range_rows += int(outside.sum())
+        seasons = X[:, self.season_col].astype(np.int64)
+        self.season_counts += np.bincount(seasons, minlength=len(self.season_counts))[:len(self.season_counts)]
+        self.label_counts += np.bincount(labels, minlength=len(self.label_counts))[:len(self.label_counts)]
+        self.rows += len(X)
+
+    def report(self):
+        """Return the PSI of every feature, the season mix and the predictions, plus range violations."""
+        self.flush()
+        with self._lock:
+            drift = {f: psi(self.counts[f], self.stats['numeric'][f]['reference']) for f in self.counts}
+            drift['season'] = psi(self.season_counts, self.stats['season'])
+            drift['prediction'] = psi(self.label_counts, self.stats['label'])
+            return {
+                'rows': self.rows,
+                'psi': drift,
+                'out_of_range': dict(self.out_of_range),
+                'out_of_range_rows': self.out_of_range_rows,
+            }
+
+    def gauges(self):
+        report = self.report()
+        gauges = {'drift_rows': report['rows'], 'out_of_range_rows': report['out_of_range_rows']}
+        for feature, value in report['psi'].items():
+            gauges[f'drift_psi{{feature="{feature}"}}'] = value
+        for feature, count in report['out_of_range'].items():
+            gauges[f'out_of_range{{feature="{feature}"}}'] = count
+        return gauges
+
+
+# --- Process-wide monitor of the artifact being served ---
+_monitor = None
+_monitor_version = None
+_monitor_lock = threading.Lock()
+
+
+def monitor(artifact):
+    """Return the :class:`DriftMonitor` of ``artifact`` (``None`` without training stats).
+
+    Serving a different artifact version starts a fresh monitor.
+    """
+    global _monitor, _monitor_version
+    if _monitor_version != artifact['version']:
+        with _monitor_lock:
+            if _monitor_version != artifact['version']:
+                stats = artifact.get('feature_stats')
+                _monitor = DriftMonitor(stats, artifact['features'], artifact['season_mapping']) if stats else None
+                _monitor_version = artifact['version']
+    return _monitor
+
+
+def record(artifact, X, labels):
+    """Add served rows (features in artifact order) and their predicted label codes."""
+    drift = monitor(artifact)
+    if drift is not None:
+        drift.record(X, labels)
+
+
+def record_row(artifact, row, label):
+    drift = _monitor if _monitor_version == artifact['version'] else monitor(artifact)
+    if drift is not None:
+        drift.record_row(row, label)
+
+
+def _gauges():
+    return _monitor.gauges() if _monitor is not None else {}
+
+
+metrics.add_collector(_gauges)
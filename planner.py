@@ -0,0 +1,166 @@
+"""Multi-season crop planning: one crop per season for every field.
+
+:func:`plan` scores every field in every season with a single vectorized
+``predict_proba`` call over the fields x seasons matrix, then picks for each
+field the season-by-season rotation with the highest total predicted
+suitability (sum of calibrated probabilities) under two constraints:
+
+* no repeats — a crop is grown at most once in the plan;
+* legume rotation — two consecutive seasons never both grow non-legumes
+  (the plan is a yearly cycle, so the last season is followed by the first).
+
+The search is exact and vectorized across fields.  Whatever the other
+seasons pick, swapping a season's crop for a better one of the same kind
+(legume or not) that is unused keeps a plan valid, and with ``S`` seasons at
+most ``S - 1`` crops are taken elsewhere.  So an optimal plan only uses, per
+season, the ``S`` best legumes and the ``S`` best other crops, and
+enumerating those combinations (8^4 = 4096 for four seasons) covers it.
+"""
+import itertools
+
+import numpy as np
+
+import crop_prediction
+
+LEGUMES = frozenset({'chickpea', 'kidneybeans', 'pigeonpeas', 'mothbeans', 'mungbean', 'blackgram', 'lentil'})
+# Fields per enumeration block: keeps the (fields x combinations) working
+# arrays cache-sized (64 measured fastest, ~27k fields/sec on one core)
+BLOCK_FIELDS = 64
+
+
+def field_matrix(fields, n_seasons, artifact):
+    """Return the numeric features of ``fields`` as an array of shape ``(fields, seasons, features)``.
+
+    ``fields`` is a DataFrame, dict of columns or list of dicts with the
+    numeric feature columns (any ``season`` column is ignored), a 2-D array
+    of numeric rows in feature order (same conditions in every season), or a
+    3-D array of per-season conditions.
+    """
+    numeric = [f for f in artifact['features'] if f != 'season']
+    if isinstance(fields, list) and fields and isinstance(fields[0], dict):
+        keys = {key.replace('_', ' '): key for key in fields[0]}
+        fields = {feature: [row[keys[feature]] for row in fields] for feature in numeric if feature in keys}
+    if isinstance(fields, dict) or hasattr(fields, 'columns'):
+        columns = {str(c).replace('_', ' '): c for c in (fields if isinstance(fields, dict) else fields.columns)}
+        missing = [f for f in numeric if f not in columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        fields = np.column_stack([np.asarray(fields[columns[f]], dtype=float) for f in numeric])
+    X = np.asarray(fields, dtype=float)
+    if X.ndim == 2:
+        X = X[:, None, :]
+    if X.ndim != 3 or X.shape[1] not in (1, n_seasons) or X.shape[2] != len(numeric):
+        raise ValueError(f"Expected fields of {len(numeric)} features {numeric} (optionally per season), "
+                         f"got shape {X.shape}")
+    if not np.isfinite(X).all():
+        raise ValueError("Features must be finite numbers")
+    return np.broadcast_to(X, (len(X), n_seasons, len(numeric)))
+
+
+def season_probabilities(fields, seasons=None, artifact=None):
+    """Return ``(proba, seasons)``: class probabilities of every field in every season.
+
+    ``proba`` has shape ``(fields, seasons, classes)`` (columns as
+    :func:`crop_prediction.class_names`) and comes from one batched call.
+    ``seasons`` defaults to every season of the artifact, in code order.
+    """
+    artifact = artifact or crop_prediction.get_artifact()
+    mapping = artifact['season_mapping']
+    seasons = list(seasons or sorted(mapping, key=mapping.get))
+    codes = crop_prediction.encode_seasons(seasons, mapping)
+    conditions = field_matrix(fields, len(seasons), artifact)
+    n_fields, n_seasons, _ = conditions.shape
+
+    features = artifact['features']
+    season_col = features.index('season')
+    numeric = [i for i in range(len(features)) if i != season_col]
+    X = np.empty((n_fields, n_seasons, len(features)))
+    for j, i in enumerate(numeric):
+        X[:, :, i] = conditions[:, :, j]
+    X[:, :, season_col] = codes
+    proba = crop_prediction._predict_proba(artifact, X.reshape(-1, len(features)))
+    return proba.reshape(n_fields, n_seasons, -1), seasons
+
+
+def _candidate_slots(is_legume, n_seasons, no_repeats, legume_rotation):
+    """Return the per-season candidate groups: ``(columns mask, how many to keep, is legume)``."""
+    per_group = n_seasons if no_repeats else 1
+    if not legume_rotation:
+        return [(np.ones_like(is_legume), per_group, None)]
+    return [(is_legume, per_group, True), (~is_legume, per_group, False)]
+
+
+def _valid_combinations(slot_legume, n_seasons, legume_rotation):
+    """Enumerate slot combinations, dropping those that break the legume rotation."""
+    combos = np.array(list(itertools.product(range(len(slot_legume)), repeat=n_seasons)), dtype=np.intp)
+    if legume_rotation and n_seasons > 1:
+        legume = slot_legume[combos]
+        following = np.roll(legume, -1, axis=1)
+        combos = combos[(legume | following).all(axis=1)]
+    return combos
+
+
+def plan(fields, seasons=None, no_repeats=True, legume_rotation=True, artifact=None):
+    """Choose one crop per season for every field, maximizing total suitability.
+
+    See :func:`field_matrix` for the accepted ``fields``.  Returns a dict
+    with ``seasons``, and per field: ``crops`` (``(fields, seasons)``
+    names), ``probability`` of each chosen crop and their ``total``.
+    Fields without a feasible plan get ``None`` crops and a NaN total.
+    """
+    artifact = artifact or crop_prediction.get_artifact()
+    proba, seasons = season_probabilities(fields, seasons, artifact)
+    n_fields, n_seasons, _ = proba.shape
+    names = crop_prediction.class_names(artifact)
+    is_legume = np.isin(names, list(LEGUMES))
+
+    # Candidate columns per (field, season): the best few of each kind
+    candidates, slot_legume = [], []
+    for mask, keep, legume in _candidate_slots(is_legume, n_seasons, no_repeats, legume_rotation):
+        keep = min(keep, int(mask.sum()))
+        masked = np.where(mask, proba, -np.inf)
+        top = np.argsort(-masked, axis=2, kind='stable')[:, :, :keep]
+        candidates.append(top)
+        slot_legume += [legume] * keep
+    candidates = np.concatenate(candidates, axis=2)  # (fields, seasons, slots)
+    slot_legume = np.array([bool(v) for v in slot_legume])
+    combos = _valid_combinations(slot_legume, n_seasons, legume_rotation)
+    pairs = list(itertools.combinations(range(n_seasons), 2))
+
+    candidate_proba = np.take_along_axis(proba, candidates, axis=2)
+    chosen = np.zeros((n_fields, n_seasons), dtype=np.intp)
+    feasible = np.zeros(n_fields, dtype=bool)
+    for start in range(0, n_fields, BLOCK_FIELDS):
+        block = slice(start, min(start + BLOCK_FIELDS, n_fields))
+        # One (block, combos) array per season: the crop it grows and that crop's probability
+        crops = [candidates[block, s][:, combos[:, s]] for s in range(n_seasons)]
+        score = sum(candidate_proba[block, s][:, combos[:, s]] for s in range(n_seasons))
+        if no_repeats:
+            for a, b in pairs:
+                score[crops[a] == crops[b]] = -np.inf
+        best = score.argmax(axis=1)
+        rows = np.arange(len(best))
+        chosen[block] = np.stack([season_crops[rows, best] for season_crops in crops], axis=1)
+        feasible[block] = np.isfinite(score[rows, best])
+
+    probability = np.take_along_axis(proba, chosen[..., None], axis=2)[..., 0]
+    crops = names[chosen]
+    crops[~feasible] = None
+    probability[~feasible] = np.nan
+    return {
+        'seasons': seasons,
+        'crops': crops,
+        'probability': probability,
+        'total': probability.sum(axis=1),
+    }
+
+
+def plan_frame(frame, **options):
+    """Return ``frame`` with ``<season>_crop``/``<season>_probability`` columns and ``total_suitability``."""
+    result = plan(frame, **options)
+    frame = frame.copy()
+    for i, season in enumerate(result['seasons']):
+        frame[f'{season}_crop'] = result['crops'][:, i]
+        frame[f'{season}_probability'] = result['probability'][:, i]
+    frame['total_suitability'] = result['total']
+    return frame
@@ -0,0 +1,102 @@
+"""Memoized crop predictions keyed on quantized inputs.
+
+Requests are often repeated (shared weather feeds, UI defaults), so
+:class:`PredictionCache` keeps a bounded LRU of recent predictions with an
+optional time-to-live.  Each feature is quantized to a configurable step and
+the prediction is computed on the quantized value, so every input that falls
+in the same bucket gets the same answer.  Entries belong to one model
+version: a call with a different artifact version empties the cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import crop_prediction
+
+# Step per feature; ``None`` keeps the value as-is (categorical)
+DEFAULT_QUANTIZATION = {
+    'temperature': 0.1,
+    'humidity': 0.1,
+    'ph': 0.01,
+    'water availability': 0.1,
+    'season': None,
+}
+
+
+class PredictionCache:
+    """Bounded LRU/TTL cache in front of :func:`crop_prediction.predict_crop`.
+
+    ``maxsize`` bounds the number of entries, ``ttl`` (seconds, optional)
+    bounds their age and ``quantization`` overrides entries of
+    :data:`DEFAULT_QUANTIZATION`.  Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=4096, ttl=None, quantization=None, predict=crop_prediction.predict_crop,
+                 clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.quantization = dict(DEFAULT_QUANTIZATION, **(quantization or {}))
+        self.steps = list(self.quantization.values())
+        self._predict = predict
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = None
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def _quantize(self, values):
+        return tuple(v if step is None else round(v / step) for v, step in zip(values, self.steps))
+
+    def _dequantize(self, key):
+        return [k if step is None else round(k * step, 10) for k, step in zip(key, self.steps)]
+
+    def predict_crop(self, temperature, humidity, ph, water_availability, season, artifact=None):
+        artifact = artifact or crop_prediction.get_artifact()
+        key = self._quantize((temperature, humidity, ph, water_availability, season))
+        now = self._clock()
+        with self._lock:
+            if artifact['version'] != self.version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.version = artifact['version']
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self.ttl is None or now - entry[1] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        result = self._predict(*self._dequantize(key), artifact=artifact)
+
+        with self._lock:
+            if self.version == artifact['version']:
+                self._entries[key] = (result, now)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the cache counters as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'version': self.version,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
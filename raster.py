@@ -0,0 +1,191 @@
+"""Whole-region crop suitability maps from aligned raster layers.
+
+The inputs are one 2-D ``.npy`` grid per measurement (temperature,
+humidity, pH, water availability), all with the same shape and cell
+alignment, plus one season for the whole region.  :func:`score_raster`
+memory-maps the layers and scores them one square tile at a time: the cells
+of a tile become one feature matrix and one vectorized ``predict_proba``
+call.  Results go straight into memory-mapped output rasters, so neither the
+inputs nor the outputs are ever held in RAM in full.
+
+Outputs, in ``output_dir``:
+
+``class.npy``
+    ``int8`` index of the recommended crop into ``classes`` of
+    ``raster.json`` (``-1`` where any input is NaN/inf, i.e. nodata).
+``probability.npy``
+    ``float32`` calibrated probability of that crop (NaN for nodata).
+``raster.json``
+    Class names, season, model version, shape and tile size.
+
+With ``workers`` > 1 tiles are scored in a process pool; each worker loads
+the artifact once and writes its tiles into the shared output files.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+import crop_prediction
+from model_store import ARTIFACT_DIR, load_artifact
+
+CLASS_FILE = 'class.npy'
+PROBABILITY_FILE = 'probability.npy'
+META_FILE = 'raster.json'
+DEFAULT_TILE = 512
+NODATA = -1
+
+
+def load_layers(layers, artifact):
+    """Validate ``layers`` (feature -> ``.npy`` path) and return them ordered by feature.
+
+    ``water_availability`` is accepted for ``water availability``.  Raises
+    ``ValueError`` for missing/unknown layers or mismatched shapes.
+    """
+    layers = {name.replace('_', ' '): path for name, path in layers.items()}
+    numeric = [f for f in artifact['features'] if f != 'season']
+    missing = [f for f in numeric if f not in layers]
+    unknown = [f for f in layers if f not in numeric]
+    if missing or unknown:
+        raise ValueError(f"Raster layers must be exactly {numeric}; missing {missing}, unknown {unknown}")
+    shapes = {f: np.load(layers[f], mmap_mode='r').shape for f in numeric}
+    if len(set(shapes.values())) != 1 or len(next(iter(shapes.values()))) != 2:
+        raise ValueError(f"Raster layers must be aligned 2-D grids of one shape, got {shapes}")
+    return {f: layers[f] for f in numeric}, next(iter(shapes.values()))
+
+
+def tiles(shape, tile=DEFAULT_TILE):
+    """Return the ``(row_start, row_stop, col_start, col_stop)`` windows covering ``shape``."""
+    if tile <= 0:
+        raise ValueError(f"Tile edge must be a positive number of cells, got {tile}")
+    height, width = shape
+    return [(r, min(r + tile, height), c, min(c + tile, width))
+            for r in range(0, height, tile) for c in range(0, width, tile)]
+
+
+def score_tile(artifact, layers, season_code, output_dir, window):
+    """Score one window of the layers into the output rasters; returns its valid-cell count."""
+    r0, r1, c0, c1 = window
+    features = artifact['features']
+    X = np.empty(((r1 - r0) * (c1 - c0), len(features)))
+    for i, feature in enumerate(features):
+        if feature == 'season':
+            X[:, i] = season_code
+        else:
+            layer = np.load(layers[feature], mmap_mode='r')
+            X[:, i] = layer[r0:r1, c0:c1].ravel()
+            del layer
+    valid = np.isfinite(X).all(axis=1)
+    all_valid = valid.all()
+    index = np.full(len(X), NODATA, dtype=np.int8)
+    probability = np.full(len(X), np.nan, dtype=np.float32)
+    if valid.any():
+        proba = crop_prediction._predict_proba(artifact, X if all_valid else X[valid])
+        best = proba.argmax(axis=1)
+        index[valid] = best
+        probability[valid] = proba[np.arange(len(best)), best]
+
+    for name, values in ((CLASS_FILE, index), (PROBABILITY_FILE, probability)):
+        out = np.load(os.path.join(output_dir, name), mmap_mode='r+')
+        out[r0:r1, c0:c1] = values.reshape(r1 - r0, c1 - c0)
+        out.flush()
+        del out
+    return int(valid.sum())
+
+
+# --- Worker side ---
+_worker_artifact = None
+
+
+def _init_worker(version, directory):
+    global _worker_artifact
+    _worker_artifact = load_artifact(version, directory)
+
+
+def _score_tile_worker(layers, season_code, output_dir, window):
+    return score_tile(_worker_artifact, layers, season_code, output_dir, window)
+
+
+def _tile_results(windows, args, workers, artifact, directory):
+    """Yield tile results in order, with at most ``2 * workers`` tiles in flight."""
+    if workers <= 1:
+        for window in windows:
+            yield score_tile(artifact, *args, window)
+        return
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(artifact['version'], directory)) as pool:
+        pending = deque()
+        for window in windows:
+            pending.append(pool.submit(_score_tile_worker, *args, window))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_raster(layers, season, output_dir, tile=DEFAULT_TILE, workers=1, artifact=None, directory=ARTIFACT_DIR,
+                 progress=None):
+    """Score aligned raster ``layers`` for one ``season`` and write the output rasters.
+
+    ``layers`` maps each numeric feature to a 2-D ``.npy`` file; ``season``
+    is a name or code.  ``progress`` is called with the cells scored so far
+    after each tile.  Returns a dict with ``cells``, ``valid_cells``,
+    ``tiles``, ``seconds`` and ``cells_per_sec``.
+    """
+    artifact = artifact or crop_prediction.get_artifact()
+    layers, shape = load_layers(layers, artifact)
+    season_code = float(crop_prediction.encode_seasons([season], artifact['season_mapping'])[0])
+    names = crop_prediction.class_names(artifact)
+    if len(names) > np.iinfo(np.int8).max:
+        raise ValueError(f"Too many classes ({len(names)}) for an int8 class raster")
+
+    windows = tiles(shape, tile)
+
+    # Start from nodata, so a cell no tile wrote can't pass for a prediction of class 0
+    os.makedirs(output_dir, exist_ok=True)
+    for name, dtype, fill in ((CLASS_FILE, np.int8, NODATA), (PROBABILITY_FILE, np.float32, np.nan)):
+        out = np.lib.format.open_memmap(os.path.join(output_dir, name), 'w+', dtype, shape)
+        out.fill(fill)
+        out.flush()
+        del out
+
+    start = time.perf_counter()
+    cells = valid_cells = 0
+    results = _tile_results(windows, (layers, season_code, output_dir), workers, artifact, directory)
+    for window, valid in zip(windows, results):
+        cells += (window[1] - window[0]) * (window[3] - window[2])
+        valid_cells += valid
+        if progress:
+            progress(cells)
+    seconds = time.perf_counter() - start
+
+    meta = {
+        'classes': names.tolist(),
+        'nodata': NODATA,
+        'season': season if isinstance(season, str) else int(season),
+        'season_code': season_code,
+        'model_version': artifact['version'],
+        'shape': list(shape),
+        'tile': tile,
+        'layers': {f: os.path.abspath(p) for f, p in layers.items()},
+    }
+    with open(os.path.join(output_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return {'cells': cells, 'valid_cells': valid_cells, 'tiles': len(windows), 'seconds': seconds,
+            'cells_per_sec': cells / seconds if seconds else float('inf')}
+
+
+def read_raster(output_dir):
+    """Return ``(crop_names, probability, meta)`` of a scored raster, memory-mapped.
+
+    ``crop_names`` is a 2-D object array (``None`` for nodata); build it only
+    for regions that fit in memory.
+    """
+    with open(os.path.join(output_dir, META_FILE), encoding='utf-8') as f:
+        meta = json.load(f)
+    index = np.load(os.path.join(output_dir, CLASS_FILE), mmap_mode='r')
+    names = np.array(meta['classes'] + [None], dtype=object)
+    return names[index], np.load(os.path.join(output_dir, PROBABILITY_FILE), mmap_mode='r'), meta
@@ -0,0 +1,99 @@
+"""Column schema and compact dtypes for the crop dataset.
+
+Measurements are stored as float32 and ``season``/``label`` as int8 codes
+(categoricals while parsing), which is a quarter of the memory of the
+float64/object columns pandas produces by default.  The helpers here build
+model inputs straight from those compact columns: each output array is
+allocated once and filled column by column, with no intermediate DataFrame
+slices or full-size copies.
+"""
+import numpy as np
+
+FEATURES = ['temperature', 'humidity', 'ph', 'water availability', 'season']
+NUMERIC_FEATURES = [f for f in FEATURES if f != 'season']
+LABEL = 'label'
+
+label_mapping = {
+    'rice': 1, 'maize': 2, 'chickpea': 3, 'kidneybeans': 4, 'pigeonpeas': 5,
+    'mothbeans': 6, 'mungbean': 7, 'blackgram': 8, 'lentil': 9,
+    'watermelon': 10, 'muskmelon': 11, 'cotton': 12, 'jute': 13
+}
+season_mapping = {'rainy': 1, 'winter': 2, 'spring': 3, 'summer': 4}
+
+MEASUREMENT_DTYPE = np.float32
+CODE_DTYPE = np.int8
+
+
+def csv_dtypes():
+    """Return ``pd.read_csv`` dtypes: float32 measurements, categorical strings."""
+    import pandas as pd
+
+    dtypes = {f: MEASUREMENT_DTYPE for f in NUMERIC_FEATURES}
+    dtypes['season'] = pd.CategoricalDtype(list(season_mapping))
+    dtypes[LABEL] = pd.CategoricalDtype(list(label_mapping))
+    return dtypes
+
+
+def encode_categorical(column, mapping):
+    """Return int8 codes for a categorical column parsed with :func:`csv_dtypes`.
+
+    Raises ``ValueError`` for values outside ``mapping`` or missing values.
+    """
+    codes = column.cat.codes.to_numpy()
+    if (codes < 0).any():
+        raise ValueError(f"Unknown or missing {column.name} values in rows: {np.flatnonzero(codes < 0)[:10].tolist()}")
+    return np.asarray(list(mapping.values()), dtype=CODE_DTYPE)[codes]
+
+
+def encode_frame(frame):
+    """Split a frame read with :func:`csv_dtypes` into compact column arrays.
+
+    Returns ``(measurements, season, label)``: an ``(n, 4)`` float32 array
+    and two int8 code arrays.
+    """
+    missing = [c for c in FEATURES + [LABEL] if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns in dataset: {missing}")
+    measurements = np.empty((len(frame), len(NUMERIC_FEATURES)), dtype=MEASUREMENT_DTYPE)
+    for i, feature in enumerate(NUMERIC_FEATURES):
+        measurements[:, i] = frame[feature].to_numpy()
+    if np.isnan(measurements).any():
+        raise ValueError("Dataset contains missing measurements")
+    return (measurements, encode_categorical(frame['season'], season_mapping),
+            encode_categorical(frame[LABEL], label_mapping))
+
+
+def feature_matrix(measurements, season, rows=None, dtype=MEASUREMENT_DTYPE):
+    """Assemble the model input in :data:`FEATURES` order.
+
+    ``rows`` optionally selects rows (any NumPy index); they are gathered
+    straight from the (possibly memory-mapped) source columns into the
+    single output array.
+    """
+    n_rows = len(season) if rows is None else len(np.arange(len(season))[rows])
+    X = np.empty((n_rows, len(FEATURES)), dtype=dtype)
+    rows = slice(None) if rows is None else rows
+    for i, feature in enumerate(FEATURES):
+        if feature == 'season':
+            X[:, i] = season[rows]
+        else:
+            X[:, i] = measurements[rows, NUMERIC_FEATURES.index(feature)]
+    return X
+
+
+def train_test_arrays(data, test_size=0.3, random_state=42):
+    """Return ``x_train, x_test, y_train, y_test`` from compact columns.
+
+    ``data`` holds ``features`` (measurements), ``season`` and ``label`` as
+    returned by :func:`dataset_cache.load`.  The split is the same as
+    ``train_test_split(X, y, test_size=test_size, random_state=random_state)``.
+    """
+    from sklearn.model_selection import ShuffleSplit
+
+    n_rows = len(data['label'])
+    splitter = ShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+    train_idx, test_idx = next(splitter.split(np.empty((n_rows, 1))))
+    label = data['label']
+    return (feature_matrix(data['features'], data['season'], train_idx),
+            feature_matrix(data['features'], data['season'], test_idx),
+            np.asarray(label[train_idx]), np.asarray(label[test_idx]))
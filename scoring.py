@@ -0,0 +1,200 @@
+"""Streaming and multi-process batch scoring of field-survey CSVs.
+
+Inputs share the schema of ``Crop_recommendation.csv`` (``label`` is not
+required).  Rows are read and scored one chunk at a time and every chunk is
+appended to the output before the next is read, so memory use is bounded by
+``chunksize`` rather than by the size of the file.
+
+:class:`ParallelScorer` spreads the scoring of each chunk over a process pool.
+Encoded features and results travel through shared memory, so workers only
+receive row ranges, and each worker loads the model artifact once.
+"""
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import crop_prediction
+from model_store import ARTIFACT_DIR, load_artifact
+
+# --- Worker side ---
+_worker_artifact = None
+
+
+def _init_worker(version, directory):
+    global _worker_artifact
+    _worker_artifact = load_artifact(version, directory)
+
+
+def _score_shard(buffers, n_rows, n_features, k, start, stop):
+    """Score rows ``start:stop`` of the shared input into the shared outputs."""
+    blocks = [shared_memory.SharedMemory(name=name) for name in buffers]
+    try:
+        X = np.ndarray((n_rows, n_features), dtype=np.float64, buffer=blocks[0].buf)
+        top = np.ndarray((n_rows, k), dtype=np.int64, buffer=blocks[1].buf)
+        top_proba = np.ndarray((n_rows, k), dtype=np.float64, buffer=blocks[2].buf)
+        proba = crop_prediction._predict_proba(_worker_artifact, X[start:stop])
+        top[start:stop], top_proba[start:stop] = crop_prediction.top_k_indices(proba, k)
+        del X, top, top_proba
+    finally:
+        for block in blocks:
+            block.close()
+    return stop - start
+
+
+# --- Parent side ---
+class ParallelScorer:
+    """Score feature matrices across a pool of worker processes.
+
+    Use as a context manager so the pool and shared memory are released.
+    ``artifact`` must be a saved artifact (it is reloaded by version in each
+    worker from ``directory``).
+    """
+
+    def __init__(self, artifact=None, workers=None, directory=ARTIFACT_DIR, min_shard=10_000):
+        self.artifact = artifact or crop_prediction.get_artifact()
+        self.workers = workers or os.cpu_count() or 1
+        self.min_shard = min_shard
+        self.names = crop_prediction.class_names(self.artifact)
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                        initargs=(self.artifact['version'], directory))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown()
+
+    def score(self, X, k=1):
+        """Return top-``k`` class indices and probabilities for the rows of ``X``.
+
+        Results are in input order; map indices to crops with ``self.names``.
+        """
+        n_rows, n_features = X.shape
+        k = min(k, len(self.names))
+        if n_rows == 0:
+            return np.empty((0, k), dtype=np.int64), np.empty((0, k))
+        blocks = [shared_memory.SharedMemory(create=True, size=max(size, 1))
+                  for size in (X.size * 8, n_rows * k * 8, n_rows * k * 8)]
+        try:
+            np.ndarray(X.shape, dtype=np.float64, buffer=blocks[0].buf)[:] = X
+            shard = max(self.min_shard, math.ceil(n_rows / (self.workers * 4)))
+            names = tuple(b.name for b in blocks)
+            futures = [self.pool.submit(_score_shard, names, n_rows, n_features, k, start,
+                                        min(start + shard, n_rows))
+                       for start in range(0, n_rows, shard)]
+            for future in futures:
+                future.result()
+            top = np.ndarray((n_rows, k), dtype=np.int64, buffer=blocks[1].buf).copy()
+            top_proba = np.ndarray((n_rows, k), dtype=np.float64, buffer=blocks[2].buf).copy()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return top, top_proba
+
+    def predict_crops(self, batch, k=1):
+        """Like :func:`crop_prediction.top_k_crops`, computed across the pool."""
+        top, top_proba = self.score(crop_prediction.to_feature_matrix(batch, self.artifact), k)
+        return self.names[top], top_proba
+
+
+def score_frame(frame, artifact, top_k=0, scorer=None):
+    """Return ``frame`` with a ``predicted_crop`` column and optional top-k columns.
+
+    When ``scorer`` (a :class:`ParallelScorer`) is given the chunk is scored
+    across its worker pool.
+    """
+    result = frame.copy()
+    if scorer is not None:
+        names, proba = scorer.predict_crops(frame, max(top_k, 1))
+    elif top_k:
+        names, proba = crop_prediction.top_k_crops(frame, top_k, artifact)
+    else:
+        result['predicted_crop'] = crop_prediction.predict_crops(frame, artifact)
+        return result
+    result['predicted_crop'] = names[:, 0]
+    for i in range(min(top_k, names.shape[1])):
+        result[f'top{i + 1}_crop'] = names[:, i]
+        result[f'top{i + 1}_probability'] = proba[:, i]
+    return result
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, frame):
+        frame.to_csv(self.path, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.header:
+            open(self.path, 'w').close()
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.writer = None
+
+    def write(self, frame):
+        table = self.pa.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {'csv': _CsvWriter, 'parquet': _ParquetWriter}
+
+
+def output_format(path):
+    """Guess the output format from the file extension (defaults to CSV)."""
+    return 'parquet' if os.path.splitext(path)[1].lower() in ('.parquet', '.pq') else 'csv'
+
+
+def score_csv(input_path, output_path, chunksize=100_000, top_k=0, fmt=None, artifact=None,
+              progress=None, workers=1, directory=ARTIFACT_DIR):
+    """Score ``input_path`` chunk by chunk and write predictions to ``output_path``.
+
+    ``fmt`` is ``'csv'`` or ``'parquet'`` (guessed from ``output_path`` when
+    omitted).  With ``workers`` > 1 each chunk is scored by a
+    :class:`ParallelScorer`; larger chunks keep the workers busier.
+    ``progress``, if given, is called with the running row count after each
+    chunk.  Returns a dict with ``rows``, ``seconds`` and ``rows_per_sec``.
+    """
+    artifact = artifact or crop_prediction.get_artifact()
+    writer = WRITERS[fmt or output_format(output_path)](output_path)
+    scorer = ParallelScorer(artifact, workers, directory) if workers > 1 else None
+    rows = 0
+    start = time.perf_counter()
+    try:
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            writer.write(score_frame(chunk, artifact, top_k, scorer))
+            rows += len(chunk)
+            if progress:
+                progress(rows)
+    finally:
+        writer.close()
+        if scorer is not None:
+            scorer.close()
+    seconds = time.perf_counter() - start
+    return {'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds if seconds else 0.0}
@@ -0,0 +1,237 @@
+"""Standalone HTTP/JSON prediction server with request micro-batching.
+
+Concurrent requests are not scored one by one: each request is validated and
+encoded on arrival, queued, and a single batching task coalesces everything
+that arrives within ``max_delay_ms`` (or until ``max_batch`` rows) into one
+vectorized :func:`crop_prediction.predict_crops` call.
+
+Endpoints::
+
+    GET  /health          -> {"status": "ok", "model_version": ...}
+    POST /predict         {"temperature": 20, "humidity": 82, "ph": 6.5,
+                           "water_availability": 200, "season": "rainy"}
+                          -> {"crop": "rice"}
+    POST /predict/batch   {"rows": [{...}, ...]}  -> {"crops": [...]}
+    GET  /stats           -> batching counters
+    GET  /metrics         -> Prometheus text (see :mod:`metrics`; ``--metrics``)
+
+Only the standard library and the prediction path of :mod:`crop_prediction`
+are used.  Run with ``python server.py --port 8000``.
+"""
+import argparse
+import asyncio
+import json
+
+import numpy as np
+
+import crop_prediction
+import metrics
+
+MAX_BODY = 16 * 1024 * 1024
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class MicroBatcher:
+    """Coalesce queued feature matrices into one model call per batch window."""
+
+    def __init__(self, artifact, max_batch=1024, max_delay_ms=2.0):
+        self.artifact = artifact
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.queue = asyncio.Queue()
+        self.batches = self.rows = self.requests = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, X):
+        """Queue the encoded rows ``X`` and wait for their crop names."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((X, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            rows = len(pending[0][0])
+            deadline = loop.time() + self.max_delay
+            while rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+            self._score(pending)
+
+    def _score(self, pending):
+        try:
+            crops = crop_prediction.predict_crops(np.concatenate([X for X, _ in pending]), self.artifact)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.requests += len(pending)
+        metrics.increment('batched_requests', len(pending))
+        self.rows += len(crops)
+        offset = 0
+        for X, future in pending:
+            if not future.done():
+                future.set_result(crops[offset:offset + len(X)].tolist())
+            offset += len(X)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'requests': self.requests,
+            'rows': self.rows,
+            'mean_requests_per_batch': self.requests / self.batches if self.batches else 0.0,
+            'queued': self.queue.qsize(),
+        }
+
+
+class PredictionServer:
+    """asyncio HTTP/1.1 server (keep-alive, JSON bodies) in front of a :class:`MicroBatcher`."""
+
+    def __init__(self, artifact=None, max_batch=1024, max_delay_ms=2.0):
+        self.artifact = artifact or crop_prediction.get_artifact()
+        self.batcher = MicroBatcher(self.artifact, max_batch, max_delay_ms)
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8000):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def _route(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok', 'model_version': self.artifact['version']}
+        if path == '/stats':
+            return 200, self.batcher.stats()
+        if path == '/metrics':
+            return 200, metrics.prometheus_text()
+        if path not in ('/predict', '/predict/batch'):
+            return 404, {'error': f"Unknown path {path}"}
+        if method != 'POST':
+            return 405, {'error': "Use POST"}
+        try:
+            payload = json.loads(body or b'null')
+            if path == '/predict':
+                if not isinstance(payload, dict):
+                    raise ValueError("Expected a JSON object of features")
+                X = crop_prediction.to_feature_matrix([payload], self.artifact)
+                return 200, {'crop': (await self.batcher.predict(X))[0]}
+            rows = payload.get('rows') if isinstance(payload, dict) else None
+            if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+                raise ValueError("Expected {\"rows\": [{...}, ...]}")
+            if not rows:
+                return 200, {'crops': []}
+            X = crop_prediction.to_feature_matrix(rows, self.artifact)
+            return 200, {'crops': await self.batcher.predict(X)}
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {'error': str(e)}
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                # The body can't be skipped reliably after a bad length, so those close the connection
+                if length < 0:
+                    status, result = 400, {'error': "Invalid Content-Length"}
+                    headers['connection'] = 'close'
+                elif length > MAX_BODY:
+                    status, result = 413, {'error': "Request body too large"}
+                    headers['connection'] = 'close'
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, result = await self._route(method, path.split('?', 1)[0], body)
+                    except Exception as e:
+                        status, result = 500, {'error': str(e)}
+                if isinstance(result, str):
+                    data, content_type = result.encode(), 'text/plain; version=0.0.4'
+                else:
+                    data, content_type = json.dumps(result).encode(), 'application/json'
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, max_batch, max_delay_ms):
+    server = PredictionServer(max_batch=max_batch, max_delay_ms=max_delay_ms)
+    port = await server.start(host, port)
+    print(f"🌾 Serving model {server.artifact['version']} on http://{host}:{port} "
+          f"(micro-batches of up to {max_batch} rows / {max_delay_ms} ms)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve crop predictions over HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=1024, help="rows per coalesced model call")
+    parser.add_argument('--max-delay-ms', type=float, default=2.0,
+                        help="how long to wait for more requests before scoring a batch")
+    parser.add_argument('--metrics', action='store_true', help="record latency metrics for GET /metrics")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        metrics.enable()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_delay_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,17 @@
-import streamlit as st
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score
 import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import crop_prediction
+import monitoring
+import sweep
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache
+
+rerun_start = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -13,41 +21,19 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Load the dataset
-@st.cache_data
-def load_data():
-    dataset = pd.read_csv("Crop_recommendation.csv")
-    return dataset
-
-# Load and prepare data
-dataset = load_data()
-
-# Map categorical values to numerical codes
-label_mapping = {
-    'rice': 1, 'maize': 2, 'chickpea': 3, 'kidneybeans': 4, 'pigeonpeas': 5,
-    'mothbeans': 6, 'mungbean': 7, 'blackgram': 8, 'lentil': 9, 
-    'watermelon': 10, 'muskmelon': 11, 'cotton': 12, 'jute': 13
-}
-season_mapping = {'rainy': 1, 'winter': 2, 'spring': 3, 'summer': 4}
-
-dataset['label'] = dataset['label'].map(label_mapping)
-dataset['season'] = dataset['season'].map(season_mapping)
-
-# Split data into features and target
-X = dataset[['temperature', 'humidity', 'ph', 'water availability', 'season']]
-y = dataset['label']
-
-# Split data into training and test sets
-x_train, x_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
-
-# Train Logistic Regression model
+# Load the persisted model artifact (trained once by `python crop_prediction.py train`).
+# The artifact carries the mappings, held-out accuracy and dataset size, so a
+# rerun never has to touch the CSV, re-split or re-evaluate the model.
+# One registry per server process holds it for all sessions and hot-swaps to
+# a newly trained version (see model_registry.py); each rerun works on the
+# artifact current when it started.
 @st.cache_resource
-def train_model():
-    model = LogisticRegression(max_iter=200)
-    model.fit(x_train, y_train)
-    return model
+def load_registry():
+    return ModelRegistry().start()
 
-model = train_model()
+artifact = load_registry().current()
+label_mapping = artifact['label_mapping']
+season_mapping = artifact['season_mapping']
 
 # Crop images dictionary
 crop_images = {
@@ -91,13 +77,88 @@ season_icons = {
     'summer': '☀️'
 }
 
-# Prediction function
-def predict_crop(temperature, humidity, ph, water_availability, season):
-    input_data = pd.DataFrame([[temperature, humidity, ph, water_availability, season]], 
-                              columns=['temperature', 'humidity', 'ph', 'water availability', 'season'])
-    prediction = model.predict(input_data)
-    crop_mapping = {v: k for k, v in label_mapping.items()}
-    return crop_mapping[prediction[0]]
+# Ranked recommendations (top crop plus alternatives, one predict_proba pass),
+# memoized on quantized inputs (see prediction_cache.py). The cache is shared
+# by all sessions and is emptied when the model version changes.
+TOP_K = 3
+
+@st.cache_resource
+def load_prediction_cache():
+    return PredictionCache(maxsize=4096, predict=partial(crop_prediction.recommend_crops, k=TOP_K))
+
+prediction_cache = load_prediction_cache()
+
+def recommend_crops(temperature, humidity, ph, water_availability, season):
+    return prediction_cache.predict_crop(temperature, humidity, ph, water_availability, season, artifact)
+
+# What-if sweeps (see sweep.py): one batched inference per (inputs, axes) tuple,
+# cached so toggling between views or sessions with the same inputs is free.
+SWEEP_FEATURES = {
+    'temperature': "🌡️ Temperature (°C)",
+    'humidity': "💧 Humidity (%)",
+    'ph': "🧪 pH Level",
+    'water availability': "🚿 Water (mm)",
+    'season': "🗓️ Season",
+}
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def compute_sweep(version, temperature, humidity, ph, water_availability, season, x, y):
+    base = dict(zip(artifact['features'], [temperature, humidity, ph, water_availability, season]))
+    return sweep.sweep(base, x, y, points=60 if y else sweep.DEFAULT_POINTS, artifact=artifact)
+
+def sweep_axis(result, axis):
+    """Return (columns, Vega-Lite encoding) placing sweep cells along one chart axis."""
+    feature, values = result[axis], result[f'{axis}_values']
+    title = SWEEP_FEATURES[feature]
+    if feature == 'season':
+        names = {code: name for name, code in season_mapping.items()}
+        return ({axis: [names[int(v)] for v in values]},
+                {axis: {'field': axis, 'type': 'nominal', 'title': title, 'sort': None}})
+    half = (values[1] - values[0]) / 2
+    columns = {axis: values, f'{axis}0': values - half, f'{axis}1': values + half}
+    return columns, {axis: {'field': f'{axis}0', 'type': 'quantitative', 'title': title},
+                     f'{axis}2': {'field': f'{axis}1'}}
+
+# Charts are plain Vega-Lite specs: building and validating the same chart
+# through Altair added ~90 ms to every rerun (142 -> 52 ms p50 without it).
+def sweep_chart(result, current):
+    """Return (data, spec) for decision bands (one feature) or a heatmap (two)."""
+    x_columns, x_encoding = sweep_axis(result, 'x')
+    crop_color = {'field': 'crop', 'type': 'nominal', 'title': "Crop"}
+    probability_tooltip = {'field': 'probability', 'type': 'quantitative', 'format': '.1%'}
+    if result['y'] is None:
+        cells = pd.DataFrame(dict(x_columns, crop=result['crops'], probability=result['probability']))
+        spec = {'height': 220, 'layer': [
+            {'mark': 'rect', 'encoding': {
+                **x_encoding, 'color': crop_color,
+                'opacity': {'field': 'probability', 'type': 'quantitative', 'legend': None},
+                'tooltip': [{'field': 'crop'}, {'field': 'x', 'title': result['x'], 'format': '.2f'},
+                            probability_tooltip]}},
+            {'mark': {'type': 'line', 'color': 'black'}, 'encoding': {
+                'x': {'field': 'x', 'type': 'quantitative'},
+                'y': {'field': 'probability', 'type': 'quantitative', 'title': "Confidence",
+                      'axis': {'format': '%'}}}},
+            {'data': {'values': [{'x': current[result['x']]}]},
+             'mark': {'type': 'rule', 'color': 'red', 'strokeWidth': 2},
+             'encoding': {'x': {'field': 'x', 'type': 'quantitative'}}},
+        ]}
+        return cells, spec
+
+    y_columns, y_encoding = sweep_axis(result, 'y')
+    n_y, n_x = result['crops'].shape
+    cells = pd.DataFrame({
+        **{k: np.tile(v, n_y) for k, v in x_columns.items()},
+        **{k: np.repeat(v, n_x) for k, v in y_columns.items()},
+        'crop': result['crops'].ravel(),
+        'probability': result['probability'].ravel(),
+    })
+    spec = {'height': 420, 'mark': 'rect', 'encoding': {
+        **x_encoding, **y_encoding, 'color': crop_color,
+        'opacity': {'field': 'probability', 'type': 'quantitative', 'legend': None,
+                    'scale': {'range': [0.35, 1]}},
+        'tooltip': [{'field': 'crop'}, {'field': 'x', 'title': result['x']},
+                    {'field': 'y', 'title': result['y']}, probability_tooltip]}}
+    return cells, spec
 
 # Custom CSS for enhanced UI
 st.markdown("""
@@ -426,7 +487,7 @@ with st.sidebar:
     
     st.markdown("---")
     
-    st.success("💡 **Tip:** Adjust parameters to see how they affect crop recommendations!")
+    st.success("💡 **Tip:** Use the What-if Explorer to see how each parameter affects crop recommendations!")
     
     st.markdown("---")
     
@@ -488,57 +549,118 @@ with col2:
 # Center the predict button
 st.markdown("<div style='text-align: center; margin: 3rem 0;'>", unsafe_allow_html=True)
 predict_button = st.button("🔍 Get Crop Recommendation", key="predict", help="Click to get AI-powered crop recommendation")
+live_predictions = st.toggle("⚡ Live predictions", key="live",
+                             help="Update the recommendation as soon as a parameter changes")
 st.markdown("</div>", unsafe_allow_html=True)
 
 # Prediction results
-if predict_button:
-    with st.spinner("🤖 AI is analyzing your farm conditions..."):
-        time.sleep(2)  # Simulate processing time
-        
-        season_code = season_mapping[season]
-        result = predict_crop(temperature, humidity, ph, water_availability, season_code)
-        
-        # Display results
-        st.markdown(f"""
-            <div class="result-container">
-                <div class="result-title">🎯 Recommended Crop</div>
-                <div class="result-crop">{result.title()}</div>
-                <div class="crop-description">{crop_descriptions[result]}</div>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        # Display crop image and details
-        col1, col2, col3 = st.columns([1, 2, 1])
-        with col2:
-            st.image(crop_images[result], caption=f"{result.title()} - Your Recommended Crop", use_container_width=True)
-        
-        # Additional crop information
-        st.markdown("""
-            <div class="input-section">
-                <div class="section-title">📋 Crop Information</div>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        info_col1, info_col2 = st.columns(2)
-        with info_col1:
-            st.info(f"**Crop Type:** {result.title()}")
-            st.info(f"**Best Season:** {season_icons[season]} {season.title()}")
-        
-        with info_col2:
-            st.info(f"**Optimal Temperature:** {temperature}°C")
-            st.info(f"**Water Requirement:** {water_availability}mm")
+if predict_button or live_predictions:
+    season_code = season_mapping[season]
+    prediction_start = time.perf_counter()
+    recommendations = recommend_crops(temperature, humidity, ph, water_availability, season_code)
+    result, confidence = recommendations[0]
+    prediction_ms = (time.perf_counter() - prediction_start) * 1000
+    cache_stats = prediction_cache.stats()
+
+    # Display results
+    st.markdown(f"""
+        <div class="result-container">
+            <div class="result-title">🎯 Recommended Crop</div>
+            <div class="result-crop">{result.title()}</div>
+            <div class="crop-description">{crop_descriptions[result]}</div>
+            <div class="accuracy-badge">🎯 Confidence: {confidence:.1%}</div>
+        </div>
+    """, unsafe_allow_html=True)
 
-# Model performance
-y_pred = model.predict(x_test)
-accuracy = accuracy_score(y_test, y_pred)
+    # Inputs outside what the model was trained on (ranges stored in the artifact)
+    if artifact.get('feature_stats'):
+        inputs = [temperature, humidity, ph, water_availability, season_code]
+        outside = monitoring.out_of_range_features(inputs, artifact['feature_stats'], artifact['features'])
+        if outside:
+            values = dict(zip(artifact['features'], inputs))
+            st.warning("⚠️ Outside the range of the training data, treat this recommendation with care: " +
+                       "; ".join(f"**{feature}** {values[feature]:g} (trained on {low:.1f}–{high:.1f})"
+                                 for feature, (low, high) in outside.items()))
+
+    # Runner-up crops, ranked by (calibrated) probability
+    st.markdown("#### 🥈 Other suitable crops")
+    alternative_cols = st.columns(TOP_K - 1)
+    for col, (crop, probability) in zip(alternative_cols, recommendations[1:]):
+        with col:
+            st.image(crop_images[crop], use_container_width=True)
+            st.markdown(f"**{crop.title()}** · {probability:.1%}")
+            st.progress(min(max(probability, 0.0), 1.0))
+
+    # Display crop image and details
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.image(crop_images[result], caption=f"{result.title()} - Your Recommended Crop", use_container_width=True)
+
+    # Additional crop information
+    st.markdown("""
+        <div class="input-section">
+            <div class="section-title">📋 Crop Information</div>
+        </div>
+    """, unsafe_allow_html=True)
+
+    info_col1, info_col2 = st.columns(2)
+    with info_col1:
+        st.info(f"**Crop Type:** {result.title()}")
+        st.info(f"**Best Season:** {season_icons[season]} {season.title()}")
+
+    with info_col2:
+        st.info(f"**Optimal Temperature:** {temperature}°C")
+        st.info(f"**Water Requirement:** {water_availability}mm")
+
+    st.caption(f"⚡ Prediction computed server-side in {prediction_ms:.2f} ms · "
+               f"cache hit rate {cache_stats['hit_rate']:.0%} ({cache_stats['hits']} hits, "
+               f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions)")
+
+# What-if explorer: the whole sensitivity surface in one batched model call
+st.markdown("""
+    <div class="input-section">
+        <div class="section-title">🔬 What-if Explorer</div>
+    </div>
+""", unsafe_allow_html=True)
+
+sweep_col1, sweep_col2 = st.columns(2)
+with sweep_col1:
+    sweep_x = st.selectbox("Vary", list(SWEEP_FEATURES), key="sweep_x", format_func=SWEEP_FEATURES.get,
+                           help="Parameter swept across its full range; the others keep their current values")
+with sweep_col2:
+    sweep_y = st.selectbox("Against (optional)", [None] + [f for f in SWEEP_FEATURES if f != sweep_x],
+                           key="sweep_y", format_func=lambda f: "— none —" if f is None else SWEEP_FEATURES[f])
+if sweep_x == 'season' and sweep_y is None:
+    # Four seasons make a poor band chart; show them against temperature instead
+    sweep_x, sweep_y = 'temperature', 'season'
+
+sweep_start = time.perf_counter()
+sweep_result = compute_sweep(artifact['version'], temperature, humidity, ph, water_availability,
+                             season_mapping[season], sweep_x, sweep_y)
+sweep_ms = (time.perf_counter() - sweep_start) * 1000
+current_inputs = dict(zip(SWEEP_FEATURES, [temperature, humidity, ph, water_availability, season]))
+sweep_data, sweep_spec = sweep_chart(sweep_result, current_inputs)
+st.vega_lite_chart(sweep_data, sweep_spec, use_container_width=True)
+if sweep_y is None:
+    st.caption(" → ".join(f"**{band['crop'].title()}** {band['start']:.1f}–{band['stop']:.1f}"
+                          for band in sweep.bands(sweep_result)))
+st.caption(f"⚡ {sweep_result['crops'].size:,} what-if predictions in {sweep_ms:.1f} ms "
+           f"(one batched model call, cached per input combination)")
+
+# Model performance (computed at training time and stored in the artifact); incrementally
+# updated models only carry the prequential accuracy on the rows of their last update
+if artifact.get('accuracy') is not None:
+    accuracy_text = f"Model Accuracy: {artifact['accuracy']:.1%}"
+else:
+    accuracy_text = f"Prequential Accuracy: {artifact['prequential_accuracy']:.1%} on the latest update"
 
 st.markdown(f"""
     <div class="result-container">
         <div class="accuracy-badge">
-            📈 Model Accuracy: {accuracy:.1%}
+            📈 {accuracy_text}
         </div>
         <div style="margin-top: 1rem; font-size: 1rem; opacity: 0.8;">
-            Trained on comprehensive agricultural dataset with {len(dataset)} samples
+            Trained on comprehensive agricultural dataset with {artifact['n_samples']} samples
         </div>
     </div>
 """, unsafe_allow_html=True)
@@ -550,3 +672,6 @@ st.markdown("""
         <p>© 2025 Agricultural Innovation Lab | Developed with ❤️ by Pradip</p>
     </div>
 """, unsafe_allow_html=True)
+
+# Per-rerun latency of this script (everything above, excluding the browser round trip)
+st.caption(f"⏱️ Rendered in {(time.perf_counter() - rerun_start) * 1000:.1f} ms · model {artifact['version']}")
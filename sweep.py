@@ -0,0 +1,94 @@
+"""What-if sweeps: the model's answer across whole parameter ranges.
+
+Instead of moving one slider at a time, :func:`sweep` holds the current
+inputs fixed and varies one or two features across their full range (the
+slider bounds of :data:`grid_engine.DEFAULT_RANGES`, or every season).  All
+points go through a single vectorized ``predict_proba`` call, so a 60 x 60
+sensitivity surface costs one batched inference.  :func:`bands` turns a
+one-feature sweep into contiguous decision bands.
+"""
+import numpy as np
+
+import crop_prediction
+from grid_engine import DEFAULT_RANGES
+
+DEFAULT_POINTS = 200
+
+
+def axis_values(feature, points=DEFAULT_POINTS, ranges=None, artifact=None):
+    """Return the values a sweep over ``feature`` visits.
+
+    Numeric features get ``points`` evenly spaced values over their range;
+    ``season`` gets every season code of the artifact.
+    """
+    if feature == 'season':
+        artifact = artifact or crop_prediction.get_artifact()
+        return np.array(sorted(artifact['season_mapping'].values()), dtype=float)
+    ranges = dict(DEFAULT_RANGES, **(ranges or {}))
+    if feature not in ranges:
+        raise ValueError(f"Unknown feature {feature!r}; choose from {sorted(ranges) + ['season']}")
+    low, high = ranges[feature]
+    return np.linspace(low, high, points)
+
+
+def sweep(base, x, y=None, points=DEFAULT_POINTS, ranges=None, artifact=None):
+    """Evaluate the model around ``base`` while varying ``x`` (and ``y``).
+
+    ``base`` maps every feature to its current value (``water_availability``
+    is accepted for ``water availability``; seasons as names or codes).
+    Returns a dict with the swept axes and, shaped ``(len(y_values),
+    len(x_values))`` (or ``(len(x_values),)`` without ``y``), the predicted
+    crop, its class index into ``names`` and its calibrated probability.
+    """
+    artifact = artifact or crop_prediction.get_artifact()
+    features = artifact['features']
+    x, y = x.replace('_', ' '), y.replace('_', ' ') if y else None
+    if x == y:
+        raise ValueError("Sweep two different features")
+    base_row = crop_prediction.to_feature_matrix([base], artifact)[0]
+    x_values = axis_values(x, points, ranges, artifact)
+    y_values = axis_values(y, points, ranges, artifact) if y else None
+
+    shape = (len(y_values), len(x_values)) if y else (len(x_values),)
+    X = np.empty((int(np.prod(shape)), len(features)))
+    X[:] = base_row
+    if y:
+        yy, xx = np.meshgrid(y_values, x_values, indexing='ij')
+        X[:, features.index(x)] = xx.ravel()
+        X[:, features.index(y)] = yy.ravel()
+    else:
+        X[:, features.index(x)] = x_values
+
+    proba = crop_prediction._predict_proba(artifact, X)
+    index = proba.argmax(axis=1)
+    names = crop_prediction.class_names(artifact)
+    return {
+        'x': x,
+        'x_values': x_values,
+        'y': y,
+        'y_values': y_values,
+        'names': names,
+        'class_index': index.reshape(shape),
+        'crops': names[index].reshape(shape),
+        'probability': proba[np.arange(len(proba)), index].reshape(shape),
+    }
+
+
+def bands(result):
+    """Return the decision bands of a one-feature sweep.
+
+    Each band is a dict with ``crop``, ``start``/``stop`` (the first and last
+    swept value predicting it) and ``mean_probability``.
+    """
+    if result['y'] is not None:
+        raise ValueError("Decision bands need a one-feature sweep")
+    index = result['class_index']
+    edges = np.flatnonzero(np.diff(index)) + 1
+    starts = np.concatenate(([0], edges))
+    stops = np.concatenate((edges, [len(index)]))
+    return [{
+        'crop': result['names'][index[start]],
+        'start': float(result['x_values'][start]),
+        'stop': float(result['x_values'][stop - 1]),
+        'mean_probability': float(result['probability'][start:stop].mean()),
+    } for start, stop in zip(starts, stops)]
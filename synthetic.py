@@ -0,0 +1,209 @@
+"""Synthetic crop datasets of any size, drawn from the bundled data's distributions.
+
+:func:`fit` estimates, for every (crop, season) combination present in
+``Crop_recommendation.csv``, its share of the rows and a multivariate normal
+over the four measurements (mean and covariance, so correlated features stay
+correlated).  Samples are clipped to the combination's observed range padded
+by one standard deviation, which keeps humidity, pH and water availability
+physically plausible.
+
+:func:`generate` streams ``n_rows`` rows in fixed-size chunks.  Chunk ``i``
+is drawn from its own ``SeedSequence(seed).spawn`` child, so the output is
+identical for a given seed whatever the number of worker processes.  Output
+is a CSV shaped like the bundled file, or a binary directory in the
+:mod:`dataset_cache` layout (``features.npy``/``season.npy``/``label.npy``
+plus ``meta.json``) that :func:`dataset_cache.load` and training read
+directly.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import crop_prediction
+import dataset_cache
+import schema
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def fit(path=crop_prediction.DATA_PATH):
+    """Return the per-(crop, season) distributions of the dataset at ``path``.
+
+    The result is a JSON-serializable dict with one entry per combination
+    under ``'groups'``: ``label``/``season`` codes, ``weight``, ``mean``,
+    ``cov``, ``low`` and ``high``.
+    """
+    import pandas as pd
+
+    dataset = crop_prediction.encode_dataset(pd.read_csv(path))
+    numeric = schema.NUMERIC_FEATURES
+    groups = []
+    for (label, season), rows in dataset.groupby(['label', 'season']):
+        values = rows[numeric].to_numpy(dtype=float)
+        std = values.std(axis=0)
+        cov = np.cov(values, rowvar=False) if len(values) > 1 else np.diag(std ** 2)
+        groups.append({
+            'label': int(label),
+            'season': int(season),
+            'weight': len(values) / len(dataset),
+            'mean': values.mean(axis=0).tolist(),
+            'cov': np.atleast_2d(cov).tolist(),
+            'low': (values.min(axis=0) - std).tolist(),
+            'high': (values.max(axis=0) + std).tolist(),
+        })
+    return {'features': numeric, 'groups': groups}
+
+
+def _chunk_seeds(seed, n_chunks):
+    return np.random.SeedSequence(seed).spawn(n_chunks)
+
+
+def sample(distributions, n_rows, seed):
+    """Draw ``n_rows`` rows; returns compact ``(features, season, label)`` arrays.
+
+    ``seed`` may be an int or a ``numpy.random.SeedSequence``.
+    """
+    rng = np.random.default_rng(seed)
+    groups = distributions['groups']
+    weights = np.array([g['weight'] for g in groups])
+    counts = rng.multinomial(n_rows, weights / weights.sum())
+    features = np.empty((n_rows, len(distributions['features'])), dtype=schema.MEASUREMENT_DTYPE)
+    season = np.empty(n_rows, dtype=schema.CODE_DTYPE)
+    label = np.empty(n_rows, dtype=schema.CODE_DTYPE)
+    start = 0
+    for group, count in zip(groups, counts):
+        stop = start + count
+        cov = np.asarray(group['cov'])
+        # Tiny jitter keeps the Cholesky factorization defined for degenerate groups
+        factor = np.linalg.cholesky(cov + np.eye(len(cov)) * 1e-9 * max(np.trace(cov), 1.0))
+        draws = group['mean'] + rng.standard_normal((count, len(cov))) @ factor.T
+        features[start:stop] = np.clip(draws, group['low'], group['high'])
+        season[start:stop] = group['season']
+        label[start:stop] = group['label']
+        start = stop
+    order = rng.permutation(n_rows)
+    return features[order], season[order], label[order]
+
+
+def _csv_chunk(distributions, n_rows, seed):
+    import pandas as pd
+
+    features, season, label = sample(distributions, n_rows, seed)
+    frame = pd.DataFrame(features, columns=distributions['features'])
+    frame['season'] = _names(schema.season_mapping)[season]
+    frame['label'] = _names(schema.label_mapping)[label]
+    return frame.to_csv(index=False, header=False, float_format='%.6f')
+
+
+def _names(mapping):
+    """Return an array mapping codes to names."""
+    names = np.empty(max(mapping.values()) + 1, dtype=object)
+    for name, code in mapping.items():
+        names[code] = name
+    return names
+
+
+def _binary_chunk(distributions, n_rows, seed, directory, start):
+    arrays = dict(zip(dataset_cache.COLUMNS, sample(distributions, n_rows, seed)))
+    for name, values in arrays.items():
+        out = np.load(os.path.join(directory, name + '.npy'), mmap_mode='r+')
+        out[start:start + n_rows] = values
+        out.flush()
+        del out
+    return n_rows
+
+
+def _spec_hash(distributions, n_rows, seed, chunk_rows):
+    spec = json.dumps({'distributions': distributions, 'n_rows': n_rows, 'seed': seed,
+                       'chunk_rows': chunk_rows}, sort_keys=True)
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+def _results(jobs, workers):
+    """Yield the job results in order, with at most ``2 * workers`` chunks in flight."""
+    if workers <= 1:
+        for fn, args in jobs:
+            yield fn(*args)
+        return
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for fn, args in jobs:
+            pending.append(pool.submit(fn, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def output_format(path):
+    """Return ``'csv'`` for ``*.csv`` paths, otherwise ``'binary'``."""
+    return 'csv' if path.lower().endswith('.csv') else 'binary'
+
+
+def generate(path, n_rows, seed=0, chunk_rows=DEFAULT_CHUNK_ROWS, workers=1, fmt=None, distributions=None,
+             progress=None):
+    """Write ``n_rows`` synthetic rows to ``path`` and return a stats dict.
+
+    ``fmt`` is ``'csv'`` or ``'binary'`` (default: from the extension; a
+    binary dataset is a directory).  ``workers`` > 1 generates chunks in
+    that many processes.  ``progress`` is called with the rows written so
+    far after each chunk.
+    """
+    import time
+
+    fmt = fmt or output_format(path)
+    if fmt not in ('csv', 'binary'):
+        raise ValueError(f"Unknown output format {fmt!r}; choose 'csv' or 'binary'")
+    distributions = distributions or fit()
+    sizes = [min(chunk_rows, n_rows - start) for start in range(0, n_rows, chunk_rows)]
+    seeds = _chunk_seeds(seed, len(sizes))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1])).tolist()
+    start_time = time.perf_counter()
+
+    if fmt == 'binary':
+        os.makedirs(path, exist_ok=True)
+        for name, dtype in dataset_cache.COLUMNS.items():
+            shape = (n_rows, len(distributions['features'])) if name == 'features' else (n_rows,)
+            # Preallocate; workers fill disjoint row ranges in place
+            np.lib.format.open_memmap(os.path.join(path, name + '.npy'), 'w+', dtype, shape).flush()
+        jobs = [(_binary_chunk, (distributions, size, chunk_seed, path, start))
+                for size, chunk_seed, start in zip(sizes, seeds, starts)]
+    else:
+        jobs = [(_csv_chunk, (distributions, size, chunk_seed)) for size, chunk_seed in zip(sizes, seeds)]
+
+    written = 0
+    out = open(path, 'w', encoding='utf-8', newline='') if fmt == 'csv' else None
+    try:
+        if out is not None:
+            out.write(','.join(schema.FEATURES + [schema.LABEL]) + '\n')
+        for size, result in zip(sizes, _results(jobs, workers)):
+            if out is not None:
+                out.write(result)
+            written += size
+            if progress:
+                progress(written)
+    finally:
+        if out is not None:
+            out.close()
+
+    if fmt == 'binary':
+        meta = {
+            'source': None,
+            'source_sha256': _spec_hash(distributions, n_rows, seed, chunk_rows),
+            'n_rows': n_rows,
+            'numeric_features': distributions['features'],
+            'label_mapping': schema.label_mapping,
+            'season_mapping': schema.season_mapping,
+            'synthetic': {'seed': seed, 'chunk_rows': chunk_rows},
+        }
+        with open(os.path.join(path, dataset_cache.META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+    seconds = time.perf_counter() - start_time
+    return {'rows': n_rows, 'seconds': seconds, 'rows_per_sec': n_rows / seconds if seconds else float('inf'),
+            'format': fmt}
+
@@ -0,0 +1,177 @@
+"""Hyperparameter search for the logistic-regression model by successive halving.
+
+Every combination of :data:`DEFAULT_GRID` (feature scaling, solver and
+regularization strength ``C``) is cross-validated on a small share of the
+training rows; only the best third of the candidates moves on to the next
+rung, which gets three times as many rows, until the survivors are fitted on
+the full folds.  The (candidate, fold) fits of a rung run in parallel on all
+cores.
+
+The folds are split, standardized and saved as ``.npy`` files once, before
+the search: workers memory-map them and fit on row prefixes, so no candidate
+copies or rescales the dataset.  Training rows within a fold are ordered so
+that every prefix keeps the class proportions.  :func:`tune` returns the
+winning configuration, which ``crop_prediction.py tune`` trains and stores
+in the artifact together with the solver iterations and fit time.
+"""
+import itertools
+import math
+import os
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+import crop_prediction
+import schema
+
+DEFAULT_GRID = {
+    'scaling': ['none', 'standard'],
+    'solver': ['lbfgs', 'newton-cg', 'saga'],
+    'C': [0.01, 0.1, 1.0, 10.0, 100.0],
+}
+MAX_ITER = 1000
+FACTOR = 3
+_PARTS = ('x_train', 'x_test', 'y_train', 'y_test')
+
+
+def candidates(grid=None):
+    """Return every combination of ``grid`` as a list of parameter dicts."""
+    grid = grid or DEFAULT_GRID
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def _stratified_order(y, rng):
+    """Return a permutation of ``y`` whose every prefix keeps the class proportions."""
+    order = rng.permutation(len(y))
+    rank = np.empty(len(y))
+    for label in np.unique(y):
+        rows = order[y[order] == label]
+        rank[rows] = (np.arange(len(rows)) + 0.5) / len(rows)
+    return np.argsort(rank, kind='stable')
+
+
+def prepare_folds(X, y, directory, folds=5, seed=42):
+    """Split ``X``/``y`` into stratified folds and save them under ``directory``.
+
+    Each fold gets raw and standardized (scaler fitted on the fold's training
+    part) feature arrays.  Returns one dict of file paths per fold.
+    """
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i, (train_idx, test_idx) in enumerate(StratifiedKFold(folds, shuffle=True, random_state=seed).split(X, y)):
+        train_idx = train_idx[_stratified_order(y[train_idx], rng)]
+        scaler = StandardScaler().fit(X[train_idx])
+        arrays = {
+            ('none', 'x_train'): X[train_idx],
+            ('none', 'x_test'): X[test_idx],
+            ('standard', 'x_train'): scaler.transform(X[train_idx]),
+            ('standard', 'x_test'): scaler.transform(X[test_idx]),
+            (None, 'y_train'): y[train_idx],
+            (None, 'y_test'): y[test_idx],
+        }
+        fold = {}
+        for (scaling, part), values in arrays.items():
+            name = f"fold{i}_{part}" + (f"_{scaling}" if scaling else '')
+            fold[(scaling, part)] = os.path.join(directory, name + '.npy')
+            np.save(fold[(scaling, part)], np.ascontiguousarray(values))
+        paths.append(fold)
+    return paths
+
+
+def _fit_candidate(params, fold, n_rows):
+    """Fit one candidate on the first ``n_rows`` training rows of one fold."""
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.linear_model import LogisticRegression
+
+    x_train, x_test, y_train, y_test = (
+        np.load(fold[(params['scaling'] if part.startswith('x') else None, part)], mmap_mode='r')
+        for part in _PARTS)
+    # The fold is already scaled, so fit the bare estimator
+    model = LogisticRegression(C=params['C'], solver=params['solver'], max_iter=MAX_ITER)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        start = time.perf_counter()
+        model.fit(x_train[:n_rows], y_train[:n_rows])
+        fit_seconds = time.perf_counter() - start
+    n_iter = int(np.max(model.n_iter_))
+    return {
+        'accuracy': float((model.predict(x_test) == y_test).mean()),
+        'fit_seconds': fit_seconds,
+        'n_iter': n_iter,
+        'converged': n_iter < MAX_ITER,
+    }
+
+
+def _summarize(params, results):
+    return {
+        'params': params,
+        'accuracy': float(np.mean([r['accuracy'] for r in results])),
+        'fit_seconds': float(np.mean([r['fit_seconds'] for r in results])),
+        'n_iter': max(r['n_iter'] for r in results),
+        'converged': all(r['converged'] for r in results),
+    }
+
+
+def successive_halving(fold_paths, n_train, grid=None, factor=FACTOR, n_jobs=-1, verbose=False):
+    """Run the search over prepared folds; returns the rungs, best last.
+
+    Each rung is a dict with its ``rows`` per fit and one summary per
+    candidate (mean fold ``accuracy`` and ``fit_seconds``, worst-case
+    ``n_iter``, ``converged``), sorted best first: highest accuracy, then
+    fastest fit.
+    """
+    from joblib import Parallel, delayed
+
+    remaining = candidates(grid)
+    # Enough rungs that the last one keeps only a few candidates
+    n_rungs = max(1, int(math.log(len(remaining), factor) + 1e-9))
+    rungs = []
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for rung in range(n_rungs):
+            n_rows = math.ceil(n_train / factor ** (n_rungs - 1 - rung))
+            results = parallel(delayed(_fit_candidate)(params, fold, n_rows)
+                               for params in remaining for fold in fold_paths)
+            per_fold = len(fold_paths)
+            summaries = sorted(
+                (_summarize(params, results[i * per_fold:(i + 1) * per_fold]) for i, params in enumerate(remaining)),
+                key=lambda s: (-s['accuracy'], s['fit_seconds']))
+            rungs.append({'rows': n_rows, 'candidates': summaries})
+            if verbose:
+                best = summaries[0]
+                print(f"🪜 Rung {rung + 1}/{n_rungs}: {len(remaining)} candidates on {n_rows:,} rows, "
+                      f"best {best['accuracy']:.2%} {best['params']}")
+            remaining = [s['params'] for s in summaries[:max(1, math.ceil(len(summaries) / factor))]]
+    return rungs
+
+
+def tune(path=crop_prediction.DATA_PATH, folds=5, grid=None, factor=FACTOR, n_jobs=-1, seed=42, verbose=False):
+    """Search :data:`DEFAULT_GRID` (or ``grid``) on the training split of ``path``.
+
+    The held-out test split that :func:`crop_prediction.train` reports on is
+    left out of the search.  Returns a dict with the ``best`` parameters, its
+    ``cv_accuracy`` and a compact ``rungs`` trace.
+    """
+    import dataset_cache
+
+    start = time.perf_counter()
+    x_train, _, y_train, _ = schema.train_test_arrays(dataset_cache.load(path), test_size=0.3, random_state=42)
+    X = x_train.astype(float)  # serving feeds float64 rows
+    with tempfile.TemporaryDirectory(prefix='crop_tuning_') as directory:
+        fold_paths = prepare_folds(X, y_train, directory, folds, seed)
+        n_train = min(len(np.load(fold[(None, 'y_train')], mmap_mode='r')) for fold in fold_paths)
+        rungs = successive_halving(fold_paths, n_train, grid, factor, n_jobs, verbose)
+    best = rungs[-1]['candidates'][0]
+    return {
+        'best': best['params'],
+        'cv_accuracy': best['accuracy'],
+        'folds': folds,
+        'candidates': len(candidates(grid)),
+        'rungs': [{'rows': r['rows'], 'candidates': len(r['candidates']),
+                   'best_accuracy': r['candidates'][0]['accuracy']} for r in rungs],
+        'seconds': time.perf_counter() - start,
+    }